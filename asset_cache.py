@@ -0,0 +1,85 @@
+# asset_cache.py - packed, pre-scaled sprite atlas cached on disk
+#
+# The first launch decodes and scales every sprite, packs them into one RGBA
+# atlas and writes it out together with an index. Later launches read that
+# file in one go and slice sprites out of it as subsurfaces, as long as the
+# key (cache version + size/mtime of every source file) still matches.
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+import pygame
+
+MAGIC = b"SIATL1"
+ATLAS_WIDTH = 512
+
+def safe_image_load(path, size=None):
+    try:
+        im = pygame.image.load(path).convert_alpha()
+        if size:
+            im = pygame.transform.scale(im, size)
+        return im
+    except Exception as e:
+        # placeholder surface
+        print(f"Image '{path}' missing: {e}")
+        placeholder = pygame.Surface(size if size else (50, 30), pygame.SRCALPHA)
+        placeholder.fill((100, 100, 120))
+        return placeholder
+
+def source_key(sources, version):
+    h = hashlib.sha1(str(version).encode())
+    for path in sources:
+        try:
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+        except OSError:
+            h.update(f"{path}:missing;".encode())
+    return h.hexdigest()
+
+def pack(sprites):
+    # shelf packing, tallest first; returns (atlas surface, {name: rect})
+    order = sorted(sprites, key=lambda n: -sprites[n].get_height())
+    rects = {}
+    x = y = shelf = 0
+    for name in order:
+        w, h = sprites[name].get_size()
+        if x + w > ATLAS_WIDTH:
+            x, y, shelf = 0, y + shelf, 0
+        rects[name] = (x, y, w, h)
+        x += w
+        shelf = max(shelf, h)
+    atlas = pygame.Surface((ATLAS_WIDTH, max(1, y + shelf)), pygame.SRCALPHA)
+    for name, (x, y, w, h) in rects.items():
+        atlas.blit(sprites[name], (x, y))
+    return atlas, rects
+
+def _slice(atlas, rects):
+    return {name: atlas.subsurface(r) for name, r in rects.items()}
+
+def load_atlas(cache_path, sources, build, version=1):
+    """Return ({name: Surface}, cache_hit). build() makes the sprites on a miss."""
+    key = source_key(sources, version)
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+        if data[:6] == MAGIC:
+            (n,) = struct.unpack_from("<I", data, 6)
+            index = json.loads(data[10:10 + n])
+            if index["key"] == key:
+                raw = zlib.decompress(data[10 + n:])
+                atlas = pygame.image.frombuffer(raw, tuple(index["size"]), "RGBA").convert_alpha()
+                return _slice(atlas, {k: tuple(r) for k, r in index["rects"].items()}), True
+    except (OSError, ValueError, KeyError, zlib.error, struct.error):
+        pass  # missing or stale cache: rebuild below
+
+    atlas, rects = pack(build())
+    index = json.dumps({"key": key, "size": atlas.get_size(), "rects": rects}).encode()
+    try:
+        with open(cache_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(index)) + index)
+            f.write(zlib.compress(pygame.image.tobytes(atlas, "RGBA"), 1))
+    except OSError as e:
+        print("Asset cache not written:", e)
+    return _slice(atlas.convert_alpha(), rects), False
@@ -0,0 +1,168 @@
+# benchmark.py - headless stress benchmarks with regression thresholds
+#
+# Runs the real step() + draw_game() loop on SDL's dummy video/audio drivers,
+# uncapped, for a fixed number of ticks per scenario.
+#
+#   python benchmark.py                    # run all scenarios, compare with baseline
+#   python benchmark.py --save-baseline    # store these numbers as the new baseline
+#   python benchmark.py -s boss_fight --ticks 3000 --threshold 15
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pygame
+
+import spaceinvador as game
+from game_core import (
+    GameState, step, spawn_boss, roll_enemies,
+    INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE, SCREEN_WIDTH, SCREEN_HEIGHT,
+)
+
+BASELINE_FILE = "bench_baseline.json"
+
+game.finish_loading(show=False)
+
+# name -> (difficulty, target enemies, target bullets, target explosions, boss, target particles)
+SCENARIOS = {
+    "medium_wave":    ("Medium", 0,    0,   0,  False, 0),
+    "enemies_1000":   ("Medium", 1000, 0,   0,  False, 0),
+    "bullets_500":    ("Medium", 0,    500, 0,  False, 0),
+    "explosions_50":  ("Medium", 0,    0,   50, False, 0),
+    "boss_fight":     ("Medium", 0,    0,   0,  True,  0),
+    "particles_3000": ("Medium", 0,    0,   0,  False, 3000),
+    "swarm_1280":     ("Swarm",  0,    0,   0,  False, 0),
+}
+
+def new_state(difficulty, seed=1234):
+    game.selected_difficulty = difficulty
+    game.state = GameState(difficulty, seed=seed, explosion_ticks=len(game.explosion_sequence))
+    game.particles.clear()
+    return game.state
+
+def refill(state, spec, rng):
+    # keep the scenario's load constant: top entities back up, never reach game over
+    _, n_enemies, n_bullets, n_explosions, boss, n_particles = spec
+    if n_enemies or n_bullets or n_explosions or n_particles:
+        state.next_boss_score = float("inf")  # stay on the wave being stressed
+    state.lives = 3
+    if state.game_state == "gameover":
+        state.game_state = "playing"
+    if boss and state.game_state != "boss":
+        spawn_boss(state)
+        state.game_state = "boss"
+    missing = n_enemies - len(state.enemies)
+    if missing > 0 and not boss:
+        x, y, speed, sprite = roll_enemies(state, missing)
+        state.enemies.spawn(x, y, speed=speed, sprite=sprite)
+    missing = n_bullets - len(state.bullets)
+    if missing > 0:
+        state.bullets.spawn(rng.uniform(0, SCREEN_WIDTH, missing), rng.uniform(0, SCREEN_HEIGHT, missing))
+    missing = n_explosions - len(state.explosions)
+    if missing > 0:
+        state.explosions.spawn(rng.uniform(0, SCREEN_WIDTH, missing), rng.uniform(0, SCREEN_HEIGHT, missing))
+    missing = n_particles - len(game.particles)
+    if missing > 0:
+        game.particles.emit(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT), missing)
+
+def scripted_inputs(tick):
+    # sweep left and right while holding fire
+    return INPUT_FIRE | (INPUT_RIGHT if (tick // 50) % 2 == 0 else INPUT_LEFT)
+
+def run_ticks(spec, ticks):
+    state = new_state(spec[0])
+    rng = np.random.default_rng(99)
+    frame_ms = np.empty(ticks)
+    for tick in range(ticks):
+        refill(state, spec, rng)
+        t0 = time.perf_counter()
+        game.tick_effects(step(state, scripted_inputs(tick)))
+        game.screen.fill(game.BLACK)
+        game.draw_game(game.screen, want_rects=False)
+        pygame.display.update()
+        frame_ms[tick] = (time.perf_counter() - t0) * 1000.0
+    return frame_ms
+
+def run_scenario(name, ticks, repeat=3):
+    spec = SCENARIOS[name]
+    run_ticks(spec, min(ticks, 30))  # warm-up
+    # best of `repeat` runs, to keep scheduler noise out of the comparison
+    wall = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ms = run_ticks(spec, ticks)
+        elapsed = time.perf_counter() - start
+        if wall is None or elapsed < wall:
+            wall, frame_ms = elapsed, ms
+    # separate, shorter pass for memory so tracemalloc doesn't skew timings
+    tracemalloc.start()
+    run_ticks(spec, min(ticks, 200))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    p50, p95, p99 = np.percentile(frame_ms, [50, 95, 99])
+    return {
+        "ticks": ticks,
+        "ticks_per_sec": ticks / wall,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "peak_mem_kb": peak / 1024.0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Space Invader stress benchmarks")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable; default: all)")
+    parser.add_argument("--ticks", type=int, default=1500, help="ticks per scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario, best one is kept")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="fail when ticks/sec drops more than this many percent below baseline")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {}
+
+    results = {}
+    failed = []
+    print(f"{'scenario':<15}{'ticks/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak KB':>10}  vs baseline")
+    for name in args.scenario or list(SCENARIOS):
+        r = run_scenario(name, args.ticks, args.repeat)
+        results[name] = r
+        note = "-"
+        if name in baseline:
+            base = baseline[name]["ticks_per_sec"]
+            change = (r["ticks_per_sec"] - base) / base * 100.0
+            note = f"{change:+.1f}%"
+            if change < -args.threshold:
+                note += "  REGRESSION"
+                failed.append(name)
+        print(f"{name:<15}{r['ticks_per_sec']:>10.0f}{r['p50_ms']:>9.3f}{r['p95_ms']:>9.3f}"
+              f"{r['p99_ms']:>9.3f}{r['peak_mem_kb']:>10.0f}  {note}")
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print("Baseline saved to", args.baseline)
+
+    if failed and not args.save_baseline:
+        print(f"FAILED: {', '.join(failed)} regressed more than {args.threshold:.0f}%")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    code = main()
+    pygame.quit()
+    sys.exit(code)
@@ -0,0 +1,103 @@
+# capture.py - threaded frame capture for recording gameplay video
+#
+# grab() blits the screen into one of a few preallocated 32-bit surfaces (the
+# only copy) and queues it; a writer thread streams it to disk and hands the
+# surface back. When every buffer is still waiting on the disk the frame is
+# dropped and counted instead of stalling the game loop.
+#
+# PATH ending in .raw: one raw BGRX stream plus PATH.json describing it, e.g.
+#   ffmpeg -f rawvideo -pixel_format bgr0 -video_size 800x600 -framerate 60 -i capture.raw out.mp4
+# any other PATH: a directory of frame_000001.png ... (gaps = dropped frames)
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+BGRX_MASKS = (0xFF0000, 0x00FF00, 0x0000FF, 0)  # little-endian bytes B, G, R, X
+PNG_LEVEL = 1  # zlib level; frames are mostly black, so speed matters more
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def write_png(path, rows, width, height):
+    # rows: (height, 1 + 3 * width) uint8, filter byte 0 then RGB. pygame.image.save
+    # would hold the GIL for the whole encode; zlib.compress lets the game run.
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(png_chunk(b"IDAT", zlib.compress(rows, PNG_LEVEL)))
+        f.write(png_chunk(b"IEND", b""))
+
+class FrameCapture:
+    def __init__(self, path, size, fps=60, pool=8):
+        self.path = path
+        self.size = size
+        self.fps = fps
+        self.raw = path.lower().endswith(".raw")
+        if self.raw:
+            self._out = open(path, "wb")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._out = None
+        self._free = queue.SimpleQueue()
+        for _ in range(pool):
+            self._free.put(pygame.Surface(size, 0, 32, BGRX_MASKS))
+        self._todo = queue.SimpleQueue()
+        self.frames = 0   # grab() calls
+        self.written = 0
+        self.dropped = 0  # no free buffer: the writer is behind
+        self.write_s = 0.0
+        self._writer = threading.Thread(target=self._write_loop, name="capture", daemon=True)
+        self._writer.start()
+
+    def grab(self, surf):
+        self.frames += 1
+        try:
+            buf = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        buf.blit(surf, (0, 0))
+        self._todo.put((self.frames, buf))
+        return True
+
+    def _write_loop(self):
+        w, h = self.size
+        rows = np.zeros((h, 1 + 3 * w), dtype=np.uint8)  # PNG scanlines, reused
+        rgb = rows[:, 1:].reshape(h, w, 3)
+        while True:
+            item = self._todo.get()
+            if item is None:
+                break
+            n, buf = item
+            t0 = time.perf_counter()
+            if self.raw:
+                self._out.write(buf.get_view("0"))  # straight from the surface's pixels
+            else:
+                px = np.frombuffer(buf.get_view("0"), dtype=np.uint8).reshape(h, buf.get_pitch() // 4, 4)
+                rgb[...] = px[:, :w, 2::-1]  # BGRX -> RGB
+                del px  # unlock the surface
+                write_png(os.path.join(self.path, f"frame_{n:06d}.png"), rows, w, h)
+            self.write_s += time.perf_counter() - t0
+            self.written += 1
+            self._free.put(buf)
+
+    def close(self):
+        # drain the queue and finish the files; returns a one-line summary
+        self._todo.put(None)
+        self._writer.join()
+        if self.raw:
+            self._out.close()
+            w, h = self.size
+            with open(self.path + ".json", "w") as f:
+                json.dump({"width": w, "height": h, "pixel_format": "bgr0", "fps": self.fps,
+                           "frames": self.written, "dropped": self.dropped}, f, indent=2)
+        ms = self.write_s / self.written * 1000 if self.written else 0.0
+        return (f"Captured {self.written} frames to {self.path} ({self.dropped} dropped, "
+                f"{ms:.1f} ms/frame to write)")
@@ -0,0 +1,65 @@
+# collision.py - uniform-grid spatial hash for broadphase collision
+#
+# Points are bucketed by grid cell once per tick; a query only looks at the
+# cells within reach of its radius, then a squared-distance narrowphase keeps
+# the same "dist < threshold" semantics as the old is_collision().
+import numpy as np
+
+_KEY_OFFSET = 1 << 20  # keeps negative cell coords positive inside the key
+# below this many candidate pairs a plain distance matrix beats the cell walk
+BRUTE_FORCE_PAIRS = 4096
+
+def _cell_keys(cx, cy):
+    return (cx + _KEY_OFFSET) * (_KEY_OFFSET * 2) + (cy + _KEY_OFFSET)
+
+class SpatialHash:
+    def __init__(self, x, y, cell=40):
+        self.cell = cell
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        keys = _cell_keys(np.floor(self.x / cell).astype(np.int64),
+                          np.floor(self.y / cell).astype(np.int64))
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.x)
+
+    def query(self, qx, qy, radius):
+        """Return (query_idx, point_idx) pairs closer than radius, sorted by query then point."""
+        qx = np.atleast_1d(np.asarray(qx, dtype=float))
+        qy = np.atleast_1d(np.asarray(qy, dtype=float))
+        empty = np.zeros(0, dtype=np.intp)
+        if len(qx) == 0 or len(self.x) == 0:
+            return empty, empty
+        if len(qx) * len(self.x) <= BRUTE_FORCE_PAIRS:
+            dx = qx[:, None] - self.x[None, :]
+            dy = qy[:, None] - self.y[None, :]
+            return np.nonzero(dx*dx + dy*dy < radius*radius)
+        qcx = np.floor(qx / self.cell).astype(np.int64)
+        qcy = np.floor(qy / self.cell).astype(np.int64)
+        reach = int(np.ceil(radius / self.cell))
+        q_parts, p_parts = [], []
+        for ox in range(-reach, reach + 1):
+            for oy in range(-reach, reach + 1):
+                k = _cell_keys(qcx + ox, qcy + oy)
+                lo = np.searchsorted(self.keys, k, "left")
+                counts = np.searchsorted(self.keys, k, "right") - lo
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                # expand every query's [lo, lo+count) bucket slice into flat pairs
+                q = np.repeat(np.arange(len(qx)), counts)
+                offs = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                q_parts.append(q)
+                p_parts.append(self.order[np.repeat(lo, counts) + offs])
+        if not q_parts:
+            return empty, empty
+        qi = np.concatenate(q_parts)
+        pi = np.concatenate(p_parts)
+        dx = qx[qi] - self.x[pi]
+        dy = qy[qi] - self.y[pi]
+        near = dx*dx + dy*dy < radius*radius
+        qi, pi = qi[near], pi[near]
+        order = np.lexsort((pi, qi))
+        return qi[order], pi[order]
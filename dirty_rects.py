@@ -0,0 +1,32 @@
+# dirty_rects.py - optional dirty-rectangle presentation
+#
+# Instead of fill + full-window update every frame, the previous frame's
+# sprite rects are restored from a pre-composited background layer and only
+# the union of last frame's and this frame's rects is pushed to the display.
+import pygame
+
+class DirtyRects:
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.prev = []
+        self.full = True  # next frame repaints and presents the whole window
+
+    def invalidate(self):
+        self.full = True
+        self.prev = []
+
+    def erase(self):
+        if self.full:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for r in self.prev:
+                self.screen.blit(self.background, r, r)
+
+    def present(self, rects):
+        if self.full:
+            pygame.display.update()
+            self.full = False
+        else:
+            pygame.display.update(self.prev + rects)
+        self.prev = rects
@@ -0,0 +1,87 @@
+# entities.py - struct-of-arrays entity storage backed by NumPy
+#
+# One array per field instead of one dict/list per entity, so movement,
+# bouncing, culling and respawn run as batch operations over the whole wave.
+# Stores are fixed-capacity pools: dead slots go on a free-list stack and are
+# handed out again by spawn(), so the hot loop never builds lists or dicts.
+import numpy as np
+
+class EntityStore:
+    FIELDS = {"x": float, "y": float, "speed": float, "sprite": np.int8}
+
+    def __init__(self, capacity=16):
+        capacity = max(1, capacity)
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.alive = np.zeros(capacity, dtype=bool)
+        # free-list stack, top at the end; lowest slots are handed out first
+        self._free = np.arange(capacity - 1, -1, -1, dtype=np.intp)
+        self._nfree = capacity
+        self.count = 0
+
+    @property
+    def capacity(self):
+        return len(self.alive)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, need):
+        # only when a caller outgrows the configured pool size
+        old = self.capacity
+        cap = old
+        while cap < need:
+            cap *= 2
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(cap - old, dtype=dtype)]))
+        self.alive = np.concatenate([self.alive, np.zeros(cap - old, dtype=bool)])
+        free = np.empty(cap, dtype=np.intp)
+        free[:cap - old] = np.arange(cap - 1, old - 1, -1)
+        free[cap - old:cap - old + self._nfree] = self._free[:self._nfree]
+        self._free = free
+        self._nfree += cap - old
+
+    def spawn(self, x, y, **values):
+        # scalars or equal-length arrays; unnamed fields reset to 0; returns the slots used
+        n = np.size(x)
+        if n > self._nfree:
+            self._grow(self.count + n)
+        idx = self._free[self._nfree - n:self._nfree][::-1].copy()
+        self._nfree -= n
+        values["x"] = x
+        values["y"] = y
+        for name in self.FIELDS:
+            getattr(self, name)[idx] = values.get(name, 0)
+        self.alive[idx] = True
+        self.count += n
+        return idx
+
+    def kill(self, which):
+        # boolean mask or index array of unique slots
+        if isinstance(which, np.ndarray) and which.dtype == bool:
+            which = np.flatnonzero(which & self.alive)
+        else:
+            which = np.asarray(which, dtype=np.intp)
+            which = which[self.alive[which]]
+        k = len(which)
+        self.alive[which] = False
+        self._free[self._nfree:self._nfree + k] = which
+        self._nfree += k
+        self.count -= k
+
+    def clear(self):
+        self.alive[:] = False
+        self._free[:] = np.arange(self.capacity - 1, -1, -1)
+        self._nfree = self.capacity
+        self.count = 0
+
+    def indices(self):
+        return np.flatnonzero(self.alive)
+
+class ExplosionPool(EntityStore):
+    FIELDS = {"x": float, "y": float, "t": np.int32}
+
+    def age(self, lifetime):
+        # advance every live explosion one tick and recycle the finished ones
+        self.t[self.alive] += 1
+        self.kill(self.alive & (self.t >= lifetime))
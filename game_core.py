@@ -0,0 +1,435 @@
+# game_core.py - headless simulation core (no display needed)
+#
+# All game rules for the "playing", "boss" and "gameover" states live here.
+# spaceinvador.py only turns keys into an input bitmask, calls step() and
+# draws whatever is in the GameState.
+import numpy as np
+
+from collision import SpatialHash
+from entities import EntityStore, ExplosionPool
+from profiler import NO_PROFILE
+
+# ---------------------------
+# CONSTANTS
+# ---------------------------
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+PLAYER_W, PLAYER_H = 60, 40
+ENEMY_W, ENEMY_H = 48, 36
+BOSS_W, BOSS_H = 140, 100
+BULLET_W, BULLET_H = 7, 18
+ENEMY_SPRITES = 3  # alien1..alien3
+
+PLAYER_SPEED = 6
+BULLET_SPEED = 9
+
+# swarm: one classic marching formation of small aliens instead of independent
+# bouncers (see step_swarm); "formation" is (columns, rows), front row first
+SWARM_W, SWARM_H = 16, 12            # sprite size
+SWARM_CELL_W, SWARM_CELL_H = 20, 16  # grid pitch
+SWARM_SPEED = 0.8        # px/tick with the formation at full strength...
+SWARM_MAX_SPEEDUP = 3.0  # ...and this many times faster with one alien left
+SWARM_DROP = 12          # px down at each edge
+SWARM_TOP = 200          # y of the front row when a wave starts
+SWARM_RETREAT = 96       # px the formation is pushed back after reaching the player
+HIDDEN_Y = -1000.0       # rows that haven't marched into view yet are parked here
+
+DIFFICULTIES = {
+    "Easy":    {"speed_mul": 0.75, "enemy_count": 6,  "bullet_limit": 7},
+    "Medium":  {"speed_mul": 1.0,  "enemy_count": 8,  "bullet_limit": 5},
+    "Hard":    {"speed_mul": 1.4,  "enemy_count": 10, "bullet_limit": 4},
+    "Swarm":   {"speed_mul": 1.0,  "enemy_count": 32 * 40, "bullet_limit": 6, "formation": (32, 40)},
+}
+BOSS_HP = {"Easy": 10, "Medium": 12, "Hard": 16, "Swarm": 16}
+
+# input bitmask
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_FIRE = 4
+
+# ticks a procedural explosion stays on screen (t = 0..8)
+EXPLOSION_TICKS = 9
+# initial explosion pool size (grows only if a tick needs more)
+EXPLOSION_POOL = 32
+
+# ---------------------------
+# STATE
+# ---------------------------
+class GameState:
+    def __init__(self, difficulty="Medium", seed=None, explosion_ticks=EXPLOSION_TICKS, config=None, players=1):
+        self.difficulty = difficulty
+        self.players = players  # 2 = co-op: a second tank (ally_x) sharing HP, lives and the bullet pool
+        # difficulty preset plus boss HP; tools may override any key (see tuner.py)
+        self.config = dict(DIFFICULTIES[difficulty], boss_hp=BOSS_HP[difficulty])
+        if config:
+            self.config.update(config)
+        self.config['bullet_limit'] *= players
+        if seed is None:
+            seed = int(np.random.default_rng().integers(2**63))
+        self.seed = seed  # kept so a run can be recorded and replayed
+        self.rng = np.random.default_rng(seed)
+        # renderer decides how long an explosion lives (frames path is 4 ticks/frame)
+        self.explosion_ticks = explosion_ticks
+        self.reset()
+
+    def reset(self):
+        self.game_state = "playing"
+        if self.players == 2:
+            self.player_x = SCREEN_WIDTH // 3 - PLAYER_W // 2
+            self.ally_x = SCREEN_WIDTH * 2 // 3 - PLAYER_W // 2
+        else:
+            self.player_x = (SCREEN_WIDTH - PLAYER_W) // 2
+            self.ally_x = None
+        self.player_y = SCREEN_HEIGHT - 70
+        # pools sized from the difficulty: bullets can never exceed bullet_limit
+        self.bullets = EntityStore(self.config['bullet_limit'])
+        self.enemies = EntityStore(self.config['enemy_count'])
+        self.swarm = None  # formation dict in swarm mode, see create_formation
+        create_enemies(self)
+        self.score = 0
+        self.player_hp = 100
+        self.lives = 3
+        self.boss = None
+        self.boss_active = False
+        self.next_boss_score = 20
+        self.explosions = ExplosionPool(EXPLOSION_POOL)
+        self.events = []  # sound cues from the last step: "shoot", "explosion", "explosion<sprite>", "boss_explosion"
+        self.tick = 0
+
+# ---------------------------
+# HELPERS
+# ---------------------------
+def roll_enemies(state, n):
+    # random x, y, speed, sprite for n fresh enemies
+    rng = state.rng
+    x = rng.integers(0, SCREEN_WIDTH - ENEMY_W, n, endpoint=True).astype(float)
+    y = rng.integers(60, 160, n, endpoint=True).astype(float)
+    speed = rng.choice([2,3,4], n) * state.config['speed_mul']
+    sprite = rng.integers(0, ENEMY_SPRITES, n)
+    return x, y, speed, sprite
+
+def create_enemies(state, count=None):
+    if state.config.get("formation"):
+        create_formation(state)
+        return
+    if count is None:
+        count = state.config["enemy_count"]
+    state.enemies.clear()
+    x, y, speed, sprite = roll_enemies(state, count)
+    state.enemies.spawn(x, y, speed=speed, sprite=sprite)
+
+def respawn_enemies(state, idx):
+    en = state.enemies
+    en.x[idx], en.y[idx], en.speed[idx], en.sprite[idx] = roll_enemies(state, len(idx))
+
+def create_formation(state):
+    # slot = row * cols + col, row 0 at the front; every alien starts parked
+    cols, rows = state.config["formation"]
+    n = cols * rows
+    en = state.enemies
+    en.clear()
+    en.spawn(np.zeros(n), np.full(n, HIDDEN_Y), sprite=np.arange(n) // cols // 4 % ENEMY_SPRITES)
+    state.swarm = {
+        'x': float((SCREEN_WIDTH - cols * SWARM_CELL_W) // 2),  # left edge of column 0
+        'y': float(SWARM_TOP),  # top of row 0
+        'dx': 1,                # marching direction
+        'left': 0, 'right': cols - 1, 'front': 0,  # outermost live columns, front live row
+    }
+    place_formation(state)
+
+def place_formation(state):
+    # positions for the rows on screen only; the ones behind them stay parked
+    sw = state.swarm
+    cols, rows = state.config["formation"]
+    shown = min(rows, max(0, int(np.ceil((sw['y'] + SWARM_H) / SWARM_CELL_H))))
+    n = shown * cols
+    slots = np.arange(n)
+    en = state.enemies
+    en.x[:n] = sw['x'] + slots % cols * SWARM_CELL_W
+    en.y[:n] = sw['y'] - slots // cols * SWARM_CELL_H
+    return n
+
+def formation_extents(state):
+    # outermost live columns and front live row, after kills
+    sw = state.swarm
+    cols, rows = state.config["formation"]
+    alive = state.enemies.alive[:cols * rows].reshape(rows, cols)
+    live_cols = np.flatnonzero(alive.any(axis=0))
+    if len(live_cols):
+        sw['left'], sw['right'] = int(live_cols[0]), int(live_cols[-1])
+        sw['front'] = int(np.argmax(alive.any(axis=1)))
+
+def spawn_boss(state):
+    state.boss = {
+        'sprite': int(state.rng.integers(ENEMY_SPRITES)),
+        'x': (SCREEN_WIDTH - BOSS_W)//2,
+        'y': 60,
+        'speed': 3 * state.config['speed_mul'],
+        'hp': state.config['boss_hp'],
+    }
+    state.boss_active = True
+    return state.boss
+
+def add_explosion(state, x, y):
+    state.explosions.spawn(x, y)
+
+def lose_life(state):
+    state.lives -= 1
+    if state.lives <= 0:
+        state.game_state = "gameover"
+
+# ---------------------------
+# STEP
+# ---------------------------
+def tank_xs(state):
+    return [state.player_x] if state.ally_x is None else [state.player_x, state.ally_x]
+
+def move_tank(x, inputs):
+    # one tick of tank movement (netplay clients use it to predict their own tank)
+    if inputs & INPUT_LEFT and x > 0:
+        x -= PLAYER_SPEED
+    if inputs & INPUT_RIGHT and x < SCREEN_WIDTH - PLAYER_W:
+        x += PLAYER_SPEED
+    return x
+
+def fire(state, x):
+    bl = state.bullets
+    # shoot with limit
+    if len(bl) < state.config['bullet_limit']:
+        bl.spawn(x + 28, state.player_y)
+        state.events.append("shoot")
+
+def move_player(state, inputs, ally_inputs=0):
+    state.player_x = move_tank(state.player_x, inputs)
+    if state.ally_x is not None:
+        state.ally_x = move_tank(state.ally_x, ally_inputs)
+    if inputs & INPUT_FIRE:
+        fire(state, state.player_x)
+    if state.ally_x is not None and ally_inputs & INPUT_FIRE:
+        fire(state, state.ally_x)
+
+def move_bullets(state):
+    # move bullets, cull the ones that left the screen
+    bl = state.bullets
+    bl.y[bl.alive] -= BULLET_SPEED
+    bl.kill(bl.alive & (bl.y < 0))
+
+# hit thresholds (distance between reference points)
+BULLET_ENEMY_DIST = 32
+ENEMY_PLAYER_DIST = 40
+BULLET_BOSS_DIST = 70
+BOSS_PLAYER_DIST = 80
+
+def bullet_hits(state, grid, ei):
+    # (enemy, bullet) index pairs within range; each enemy and bullet used once,
+    # resolved in enemy order like the old nested loop
+    bl = state.bullets
+    bi = bl.indices()
+    qi, pi = grid.query(bl.x[bi], bl.y[bi], BULLET_ENEMY_DIST)
+    order = np.lexsort((qi, pi))
+    hit_e, hit_b = [], []
+    for e, b in zip(pi[order].tolist(), qi[order].tolist()):
+        if (hit_e and hit_e[-1] == e) or b in hit_b:
+            continue
+        hit_e.append(e)
+        hit_b.append(b)
+    return ei[hit_e], bi[hit_b]
+
+def step_playing(state, prof=NO_PROFILE):
+    # spawn boss if condition met (the wave still updates this tick)
+    if (not state.boss_active) and state.score >= state.next_boss_score and state.score != 0:
+        spawn_boss(state)
+        state.game_state = "boss"
+
+    en = state.enemies
+    live = en.alive
+    en.x[live] += en.speed[live]
+    bounce = live & ((en.x <= 0) | (en.x >= SCREEN_WIDTH - ENEMY_W))
+    en.speed[bounce] = -en.speed[bounce]
+    en.y[bounce] += 40
+
+    # enemies that fall too low cost a life each and are removed
+    low = np.flatnonzero(live & (en.y > SCREEN_HEIGHT - 120))
+    if len(low):
+        for i in low:
+            add_explosion(state, en.x[i], en.y[i])
+        en.kill(low)
+        for _ in low:
+            lose_life(state)
+    prof.mark("enemies")
+
+    # broadphase grid over the surviving wave, shared by both checks below
+    ei = en.indices()
+    grid = SpatialHash(en.x[ei], en.y[ei], cell=ENEMY_PLAYER_DIST)
+
+    # bullets vs enemy
+    hit_e, hit_b = bullet_hits(state, grid, ei)
+    if len(hit_e):
+        state.bullets.kill(hit_b)
+        for i in hit_e:
+            state.events.append(f"explosion{en.sprite[i]}")
+            add_explosion(state, en.x[i], en.y[i])
+        respawn_enemies(state, hit_e)
+        state.score += len(hit_e)
+
+    # enemy vs player collision - damage HP
+    # (enemy centre is top-left + (24, 18), so query with the player centre shifted back)
+    handled = hit_e
+    for px in tank_xs(state):
+        _, near = grid.query(px + 30 - 24, state.player_y + 20 - 18, ENEMY_PLAYER_DIST)
+        touching = np.setdiff1d(ei[near], handled)
+        for i in touching:
+            state.player_hp -= 30
+            state.events.append("explosion")
+            add_explosion(state, en.x[i], en.y[i])
+            if state.player_hp <= 0:
+                state.player_hp = 100
+                lose_life(state)
+        if len(touching):
+            # respawn position only, speed is kept
+            x, y, _, _ = roll_enemies(state, len(touching))
+            en.x[touching], en.y[touching] = x, y
+            handled = np.union1d(handled, touching)
+
+    if len(en) == 0:
+        create_enemies(state)
+    prof.mark("collision")
+
+def swarm_hits(state):
+    # bullet tips mapped straight onto the formation grid: (enemy slots, bullets),
+    # one bullet per enemy, lowest bullet slot first
+    sw = state.swarm
+    cols, rows = state.config["formation"]
+    bl = state.bullets
+    bi = bl.indices()
+    rel_x = bl.x[bi] + BULLET_W / 2 - sw['x']
+    rel_y = sw['y'] - bl.y[bi]  # how far above the front row's top
+    col = np.floor(rel_x / SWARM_CELL_W).astype(np.intp)
+    row = np.ceil(rel_y / SWARM_CELL_H).astype(np.intp)
+    inside = ((col >= 0) & (col < cols) & (rel_x - col * SWARM_CELL_W < SWARM_W)
+              & (row >= 0) & (row < rows) & (row * SWARM_CELL_H - rel_y < SWARM_H))
+    slot = row[inside] * cols + col[inside]
+    bi = bi[inside]
+    live = state.enemies.alive[slot]
+    slot, first = np.unique(slot[live], return_index=True)
+    return slot, bi[live][first]
+
+def step_swarm(state, prof=NO_PROFILE):
+    # the formation moves, bounces and lands as one: O(1) per tick, then
+    # positions are written for the visible rows only
+    sw = state.swarm
+    en = state.enemies
+    cols, rows = state.config["formation"]
+    thinned = 1.0 - len(en) / (cols * rows)
+    speed = SWARM_SPEED * state.config['speed_mul'] * (1.0 + (SWARM_MAX_SPEEDUP - 1.0) * thinned)
+    sw['x'] += sw['dx'] * speed
+    left = sw['x'] + sw['left'] * SWARM_CELL_W
+    right = sw['x'] + sw['right'] * SWARM_CELL_W + SWARM_W
+    if left <= 0 or right >= SCREEN_WIDTH:
+        sw['dx'] = -sw['dx']
+        sw['y'] += SWARM_DROP
+    # the front reaching the player costs a life and pushes the whole formation back
+    if sw['y'] - sw['front'] * SWARM_CELL_H + SWARM_H > SCREEN_HEIGHT - 120:
+        state.events.append("explosion")
+        add_explosion(state, state.player_x, state.player_y)
+        lose_life(state)
+        sw['y'] -= SWARM_RETREAT
+        en.y[:cols * rows] = HIDDEN_Y  # rows pushed out of view are parked again
+    place_formation(state)
+    prof.mark("enemies")
+
+    hit_e, hit_b = swarm_hits(state)
+    if len(hit_e):
+        state.bullets.kill(hit_b)
+        for i in hit_e:
+            state.events.append(f"explosion{en.sprite[i]}")
+        state.explosions.spawn(en.x[hit_e] - (ENEMY_W - SWARM_W) / 2, en.y[hit_e] - (ENEMY_H - SWARM_H) / 2)
+        en.kill(hit_e)
+        state.score += len(hit_e)
+        if len(en) == 0:
+            create_formation(state)
+        else:
+            formation_extents(state)
+    prof.mark("collision")
+
+def end_boss_fight(state):
+    state.boss = None
+    state.boss_active = False
+    create_enemies(state)
+    state.game_state = "playing"
+
+def step_boss(state):
+    boss = state.boss
+    bcx = boss['x'] + BOSS_W/2
+    bcy = boss['y'] + BOSS_H/2
+
+    # bullets vs boss, in bullet order until the boss dies
+    bl = state.bullets
+    bi = bl.indices()
+    _, near = SpatialHash(bl.x[bi], bl.y[bi], cell=BULLET_BOSS_DIST).query(bcx, bcy, BULLET_BOSS_DIST)
+    hits = bi[near][:boss['hp']]
+    if len(hits):
+        bl.kill(hits)
+        for _ in hits:
+            state.events.append("explosion")
+            add_explosion(state, boss['x'], boss['y'])
+        boss['hp'] -= len(hits)
+        if boss['hp'] <= 0:
+            state.events.append("boss_explosion")
+            add_explosion(state, boss['x'], boss['y'])
+            state.score += 10
+            state.next_boss_score += 20
+            end_boss_fight(state)
+            return
+
+    # boss hits player
+    for px in tank_xs(state):
+        dx = bcx - (px + 30)
+        dy = bcy - (state.player_y + 20)
+        if dx*dx + dy*dy < BOSS_PLAYER_DIST**2:
+            state.player_hp -= 40
+            state.events.append("explosion")
+            add_explosion(state, boss['x'], boss['y'])
+            if state.player_hp <= 0:
+                state.player_hp = 100
+                lose_life(state)
+                if state.game_state != "gameover":
+                    end_boss_fight(state)
+                return
+
+def step(state, inputs, prof=NO_PROFILE, ally_inputs=0):
+    """Advance the simulation by one 60 Hz tick and return the sound cues.
+
+    ally_inputs drives the second tank of a co-op (players=2) state."""
+    state.events = []
+    if state.game_state == "gameover":
+        return state.events
+    state.tick += 1
+    state.explosions.age(state.explosion_ticks)
+    prof.mark("explosions")
+
+    if state.game_state == "boss":
+        # safety: ensure boss exists
+        if state.boss is None:
+            spawn_boss(state)
+        boss = state.boss
+        boss['x'] += boss['speed']
+        if boss['x'] <= 0 or boss['x'] >= SCREEN_WIDTH - BOSS_W:
+            boss['speed'] = -boss['speed']
+        move_player(state, inputs, ally_inputs)
+        prof.mark("input")
+        move_bullets(state)
+        prof.mark("bullets")
+        step_boss(state)
+        prof.mark("boss")
+    else:
+        move_player(state, inputs, ally_inputs)
+        prof.mark("input")
+        move_bullets(state)
+        prof.mark("bullets")
+        if state.swarm is not None:
+            step_swarm(state, prof)
+        else:
+            step_playing(state, prof)
+    return state.events
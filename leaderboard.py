@@ -0,0 +1,150 @@
+# leaderboard.py - per-difficulty top-N leaderboard in SQLite
+#
+# Every finished run is one row (score, length, bosses beaten, seed, time).
+# Writes go through a queue to a writer thread with its own connection, so a
+# game over never waits on the disk; reads use an index on
+# (difficulty, score DESC) and stay fast with hundreds of thousands of runs.
+#
+#   python leaderboard.py                 # top 10 for every difficulty
+#   python leaderboard.py -d Hard -n 25
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+DB_FILE = "leaderboard.db"
+LEGACY_FILE = "highscore.txt"  # single-integer high score from older versions
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    difficulty TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    bosses INTEGER NOT NULL,
+    seed INTEGER,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_top ON runs (difficulty, score DESC, played_at);
+"""
+COLUMNS = ("difficulty", "score", "ticks", "bosses", "seed", "played_at")
+
+class Leaderboard:
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.db = self._connect()
+        self.db.executescript(SCHEMA)
+        self._import_legacy()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="leaderboard", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5.0)
+        db.execute("PRAGMA journal_mode=WAL")  # readers don't wait for the writer
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _import_legacy(self):
+        # carry an old highscore.txt over once, with no difficulty attached
+        if self.db.execute("SELECT 1 FROM runs LIMIT 1").fetchone():
+            return
+        try:
+            with open(LEGACY_FILE) as f:
+                score = int(f.read().strip())
+        except (OSError, ValueError):
+            return
+        with self.db:
+            self.db.execute("INSERT INTO runs (difficulty, score, ticks, bosses, seed, played_at) "
+                            "VALUES ('', ?, 0, 0, NULL, ?)", (score, time.time()))
+
+    # ---------------------------
+    # WRITES (background thread)
+    # ---------------------------
+    def submit(self, difficulty, score, ticks=0, bosses=0, seed=None):
+        self._queue.put((difficulty, int(score), int(ticks), int(bosses), seed, time.time()))
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            run = self._queue.get()
+            if run is None:
+                break
+            batch = [run]
+            while not self._queue.empty():  # coalesce a burst into one commit
+                run = self._queue.get()
+                if run is None:
+                    break
+                batch.append(run)
+            try:
+                with db:
+                    db.executemany("INSERT INTO runs (difficulty, score, ticks, bosses, seed, played_at) "
+                                   "VALUES (?, ?, ?, ?, ?, ?)", batch)
+            except sqlite3.Error as e:
+                print("Leaderboard write failed:", e)
+            if run is None:
+                break
+        db.close()
+
+    def close(self, timeout=5.0):
+        # flush pending writes
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self.db.close()
+
+    # ---------------------------
+    # QUERIES
+    # ---------------------------
+    def top(self, difficulty, n=10):
+        rows = self.db.execute(
+            "SELECT difficulty, score, ticks, bosses, seed, played_at FROM runs "
+            "WHERE difficulty = ? ORDER BY score DESC, played_at LIMIT ?", (difficulty, n))
+        return [dict(zip(COLUMNS, r)) for r in rows]
+
+    def rank(self, difficulty, score):
+        # 1-based place a new run with this score would take (after earlier ties)
+        (better,) = self.db.execute(
+            "SELECT COUNT(*) FROM runs WHERE difficulty = ? AND score >= ?", (difficulty, score)).fetchone()
+        return better + 1
+
+    def best(self, difficulty=None):
+        if difficulty is None:
+            (score,) = self.db.execute("SELECT MAX(score) FROM runs").fetchone()
+        else:
+            (score,) = self.db.execute(
+                "SELECT score FROM runs WHERE difficulty = ? ORDER BY score DESC LIMIT 1",
+                (difficulty,)).fetchone() or (None,)
+        return score or 0
+
+    def stats(self, difficulty):
+        # (runs, mean score, total play time in s)
+        runs, mean, ticks = self.db.execute(
+            "SELECT COUNT(*), AVG(score), SUM(ticks) FROM runs WHERE difficulty = ?", (difficulty,)).fetchone()
+        return runs, mean or 0.0, (ticks or 0) / 60.0
+
+def main(argv=None):
+    from game_core import DIFFICULTIES
+    parser = argparse.ArgumentParser(description="Show the local leaderboard")
+    parser.add_argument("-d", "--difficulty", action="append", choices=list(DIFFICULTIES),
+                        help="difficulty to show (repeatable; default: all)")
+    parser.add_argument("-n", type=int, default=10, help="entries per difficulty")
+    parser.add_argument("--db", default=DB_FILE)
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        print("No leaderboard yet:", args.db)
+        return 1
+    board = Leaderboard(args.db)
+    for diff in args.difficulty or list(DIFFICULTIES):
+        runs, mean, secs = board.stats(diff)
+        print(f"{diff}: {runs} runs, mean score {mean:.1f}, {secs / 3600:.1f} h played")
+        for i, r in enumerate(board.top(diff, args.n), 1):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["played_at"]))
+            print(f"  {i:>3}. {r['score']:>6}  {r['ticks'] / 60:7.1f}s  bosses {r['bosses']:<3} {when}")
+    board.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+# loader.py - run slow startup jobs (mixer, sounds, sprites, music) on a worker thread
+#
+# The main thread keeps drawing a progress screen and swaps the results in for
+# its placeholders once `done` is set. A failing job is reported and leaves
+# None in `results`, so the game keeps running on its placeholder.
+import threading
+import time
+
+class BackgroundLoader:
+    def __init__(self, jobs):
+        self.jobs = list(jobs)  # [(name, fn), ...] run in order
+        self.results = {}
+        self.current = None
+        self.finished = 0
+        self.done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="asset-loader", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        for name, fn in self.jobs:
+            self.current = name
+            t0 = time.perf_counter()
+            try:
+                self.results[name] = fn()
+            except Exception as e:
+                print(f"Loading {name} failed: {e}")
+                self.results[name] = None
+            self.results[name + "_ms"] = (time.perf_counter() - t0) * 1000.0
+            self.finished += 1
+        self.current = None
+        self.done.set()
+
+    def progress(self):
+        return self.finished / len(self.jobs) if self.jobs else 1.0
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
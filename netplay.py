@@ -0,0 +1,359 @@
+# netplay.py - two-player co-op over asyncio: authoritative server + client
+#
+# The server owns the only real GameState (game_core with players=2) and steps
+# it at 60 Hz from the input bitmasks the clients send, one message per tick.
+# Every tick each client gets a snapshot: the savestate encoding of the whole
+# state, XOR'd against the last snapshot that client was sent and zlib'd -
+# usually a few dozen bytes. Clients draw the latest snapshot and predict
+# their own tank from the inputs the server hasn't applied yet, so steering
+# feels the same as single player.
+#
+#   python netplay.py serve -d Hard          # waits for two players
+#   python spaceinvador.py --join 127.0.0.1  # run twice (or once + a bot)
+#   python netplay.py bot                    # headless stand-in player
+import argparse
+import asyncio
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+import savestate
+from game_core import GameState, DIFFICULTIES, step, move_tank, INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE
+
+PORT = 5555
+TICK_HZ = 60
+MAX_QUEUED_INPUTS = 4      # per client; older inputs are dropped beyond this (bounds input lag)
+MAX_WRITE_BUFFER = 64 * 1024  # skip snapshots to a client whose socket is this far behind
+REPORT_EVERY = 5.0          # s between server bandwidth/RTT reports
+
+# every message: payload length, type
+FRAME = struct.Struct("<IB")
+WELCOME, INPUT, SNAPSHOT, BYE = range(4)
+WELCOME_MSG = struct.Struct("<B")        # player slot (0 = player_x, 1 = ally_x)
+INPUT_MSG = struct.Struct("<IBdd")       # seq, inputs, echoed server time, seconds it was held
+SNAPSHOT_MSG = struct.Struct("<IIdfBH")  # tick, last applied input seq, server time, RTT ms, is delta, events length
+
+def frame(kind, payload=b""):
+    return FRAME.pack(len(payload), kind) + payload
+
+async def read_msg(reader):
+    n, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+    return kind, await reader.readexactly(n)
+
+def no_delay(writer):
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+class DeltaStream:
+    # one direction of a snapshot stream: each blob travels as the zlib'd XOR
+    # against the previous one (whole when the size changed, e.g. a store grew)
+    def __init__(self):
+        self.prev = None
+
+    def pack(self, blob):
+        delta = self.prev is not None and len(self.prev) == len(blob)
+        body = zlib.compress(savestate.xor_bytes(self.prev, blob) if delta else blob, 6)
+        self.prev = blob
+        return delta, body
+
+    def unpack(self, delta, body):
+        blob = zlib.decompress(body)
+        if delta:
+            blob = savestate.xor_bytes(self.prev, blob)
+        self.prev = blob
+        return blob
+
+class LinkStats:
+    # byte counters with a once-a-second rate, plus a smoothed round-trip time
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.sent = self.received = 0
+        self.up = self.down = 0.0  # bytes/s over the last window
+        self.rtt = None            # s
+        self._window = (clock(), 0, 0)
+
+    def add_rtt(self, sample):
+        self.rtt = sample if self.rtt is None else self.rtt + (sample - self.rtt) / 8
+
+    def update(self):
+        t0, sent0, received0 = self._window
+        now = self.clock()
+        if now - t0 >= 1.0:
+            self.up = (self.sent - sent0) / (now - t0)
+            self.down = (self.received - received0) / (now - t0)
+            self._window = (now, self.sent, self.received)
+
+    def describe(self):
+        rtt = "-" if self.rtt is None else f"{self.rtt * 1000:.1f} ms"
+        return f"up {self.up / 1024:.1f} KB/s  down {self.down / 1024:.1f} KB/s  rtt {rtt}"
+
+# ---------------------------
+# SERVER
+# ---------------------------
+class Peer:
+    def __init__(self, slot, writer):
+        self.slot = slot
+        self.writer = writer
+        self.inputs = deque(maxlen=MAX_QUEUED_INPUTS)  # (seq, inputs) not applied yet
+        self.held = 0      # last inputs, repeated while none are queued
+        self.ack = 0       # seq of the last applied input
+        self.stream = DeltaStream()
+        self.stats = LinkStats()
+
+    def next_input(self):
+        if self.inputs:
+            self.ack, self.held = self.inputs.popleft()
+        return self.held
+
+class CoopServer:
+    def __init__(self, difficulty="Medium", seed=None, players=2, clock=time.perf_counter):
+        self.state = GameState(difficulty, seed=seed, players=players)
+        self.clock = clock
+        self.peers = [None] * players
+        self.ticks_late = 0  # ticks that started after their slot (server overloaded)
+
+    async def serve(self, host="127.0.0.1", port=PORT):
+        server = await asyncio.start_server(self._handle, host, port)
+        print(f"Co-op server on {host}:{port}, {self.state.difficulty}, seed {self.state.seed}")
+        async with server:
+            await self.run()
+        return self.state
+
+    async def _handle(self, reader, writer):
+        no_delay(writer)
+        if None not in self.peers:
+            writer.write(frame(BYE))
+            writer.close()
+            return
+        peer = Peer(self.peers.index(None), writer)
+        self.peers[peer.slot] = peer
+        print(f"Player {peer.slot + 1} joined from {writer.get_extra_info('peername')}")
+        writer.write(frame(WELCOME, WELCOME_MSG.pack(peer.slot)))
+        try:
+            while True:
+                kind, payload = await read_msg(reader)
+                peer.stats.received += FRAME.size + len(payload)
+                if kind == INPUT:
+                    seq, inputs, echo, held = INPUT_MSG.unpack(payload)
+                    peer.inputs.append((seq, inputs))
+                    if echo:
+                        peer.stats.add_rtt(self.clock() - echo - held)
+                elif kind == BYE:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            print(f"Player {peer.slot + 1} left: {peer.stats.describe()}")
+            self.peers[peer.slot] = None
+            writer.close()
+
+    async def run(self):
+        # wait for a full team, then tick until game over or everyone left
+        while None in self.peers:
+            await asyncio.sleep(0.05)
+        state = self.state
+        next_tick = self.clock()
+        next_report = next_tick + REPORT_EVERY
+        while state.game_state != "gameover" and any(self.peers):
+            inputs = [p.next_input() if p else 0 for p in self.peers]
+            events = step(state, inputs[0], ally_inputs=inputs[1] if len(inputs) > 1 else 0)
+            self.broadcast(events)
+            now = self.clock()
+            if now >= next_report:
+                next_report = now + REPORT_EVERY
+                for p in self.peers:
+                    if p:
+                        print(f"P{p.slot + 1}: {p.stats.describe()}")
+            next_tick += 1.0 / TICK_HZ
+            if next_tick < now:
+                self.ticks_late += 1
+                next_tick = max(next_tick, now - 0.25)  # drop a backlog over 1/4 s instead of racing through it
+            await asyncio.sleep(max(0.0, next_tick - now))
+        await asyncio.sleep(0.1)  # let the final snapshot drain
+
+    def broadcast(self, events):
+        blob = savestate.encode(self.state)
+        cues = ",".join(events).encode()
+        for p in self.peers:
+            if p is None:
+                continue
+            p.stats.update()
+            if p.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                continue  # the delta chain continues from the last snapshot actually sent
+            delta, body = p.stream.pack(blob)
+            rtt_ms = (p.stats.rtt or 0.0) * 1000
+            msg = frame(SNAPSHOT, SNAPSHOT_MSG.pack(self.state.tick, p.ack, self.clock(), rtt_ms, delta, len(cues))
+                        + cues + body)
+            p.writer.write(msg)
+            p.stats.sent += len(msg)
+
+# ---------------------------
+# CLIENT
+# ---------------------------
+# Runs its own asyncio loop on a daemon thread; the game loop calls
+# send_input() once per sim tick and latest() once per rendered frame.
+class CoopClient:
+    def __init__(self, host="127.0.0.1", port=PORT, clock=time.perf_counter):
+        self.host, self.port = host, port
+        self.clock = clock
+        self.slot = None
+        self.stats = LinkStats(clock)
+        self.connected = threading.Event()
+        self.closed = threading.Event()
+        self.error = None
+        self._lock = threading.Lock()
+        self._state = None       # latest authoritative state (only the game thread touches it once handed over)
+        self._base_x = 0         # our tank's x in it, before prediction
+        self._events = []        # cues received since the last latest() call
+        self._echo = (0.0, 0.0)  # (server time, local receive time) of the newest snapshot
+        self._pending = deque()  # (seq, inputs) sent but not yet applied by the server
+        self._seq = 0
+        self._loop = self._writer = None
+        self._thread = threading.Thread(target=self._run, name="netplay", daemon=True)
+
+    def start(self, timeout=5.0):
+        self._thread.start()
+        if not self.connected.wait(timeout) or self.slot is None:
+            raise ConnectionError(self.error or f"could not join {self.host}:{self.port}")
+        return self
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self.error = str(e) or type(e).__name__
+        finally:
+            self.closed.set()
+            self.connected.set()
+
+    async def _main(self):
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._loop = asyncio.get_running_loop()
+        no_delay(self._writer)
+        kind, payload = await read_msg(reader)
+        if kind != WELCOME:
+            self.error = "server is full"
+            return
+        (self.slot,) = WELCOME_MSG.unpack(payload)
+        self.connected.set()
+        stream = DeltaStream()
+        while True:
+            kind, payload = await read_msg(reader)
+            self.stats.received += FRAME.size + len(payload)
+            self.stats.update()
+            if kind != SNAPSHOT:
+                break
+            tick, ack, server_time, rtt_ms, delta, n = SNAPSHOT_MSG.unpack_from(payload)
+            pos = SNAPSHOT_MSG.size
+            cues = payload[pos:pos + n].decode()
+            state = savestate.decode(stream.unpack(delta, payload[pos + n:]))
+            with self._lock:
+                self._state = state
+                self._base_x = state.player_x if self.slot == 0 else state.ally_x
+                if cues:
+                    self._events += cues.split(",")
+                self._echo = (server_time, self.clock())
+                self.stats.rtt = rtt_ms / 1000 if rtt_ms else None  # measured by the server
+                while self._pending and self._pending[0][0] <= ack:
+                    self._pending.popleft()
+            if state.game_state == "gameover":
+                break
+        self._writer.close()
+
+    def send_input(self, inputs):
+        if self.closed.is_set() or self._state is None:
+            return  # nothing to predict from before the game starts
+        self._seq += 1
+        with self._lock:
+            self._pending.append((self._seq, inputs))
+            server_time, received = self._echo
+            self._echo = (0.0, 0.0)  # echo each server timestamp once
+        held = self.clock() - received if server_time else 0.0
+        msg = frame(INPUT, INPUT_MSG.pack(self._seq, inputs, server_time, held))
+        self.stats.sent += len(msg)
+        self._call(self._writer.write, msg)
+
+    def _call(self, fn, *args):
+        try:
+            self._loop.call_soon_threadsafe(fn, *args)
+        except RuntimeError:  # the connection closed under us
+            pass
+
+    def latest(self):
+        # (state, cues) - the newest server state with our own tank moved on by
+        # the inputs it hasn't applied yet; state is None until the first snapshot
+        with self._lock:
+            state, base_x, events, self._events = self._state, self._base_x, self._events, []
+            pending = [inputs for _, inputs in self._pending]
+        if state is None:
+            return None, events
+        x = base_x
+        for inputs in pending:
+            x = move_tank(x, inputs)
+        if self.slot == 0:
+            state.player_x = x
+        else:
+            state.ally_x = x
+        return state, events
+
+    def close(self):
+        if self._loop is not None and not self.closed.is_set():
+            self._call(self._writer.write, frame(BYE))
+        self.closed.wait(1.0)
+
+# ---------------------------
+# CLI
+# ---------------------------
+def run_bot(host, port, seconds, seed=None):
+    # headless stand-in for a second player: random walk, fires constantly
+    rng = np.random.default_rng(seed)
+    client = CoopClient(host, port).start()
+    print(f"Bot joined as player {client.slot + 1}")
+    moves = (0, INPUT_LEFT, INPUT_RIGHT)
+    inputs, t_end = INPUT_FIRE, time.perf_counter() + seconds
+    next_tick = time.perf_counter()
+    while not client.closed.is_set() and time.perf_counter() < t_end:
+        if rng.random() < 0.05:
+            inputs = INPUT_FIRE | moves[rng.integers(3)]
+        client.send_input(inputs)
+        next_tick += 1.0 / TICK_HZ
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+    state, _ = client.latest()
+    print(f"Bot: {client.stats.describe()}, tick {state.tick if state else 0}")
+    client.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Space Invader co-op server / test client")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve = sub.add_parser("serve", help="run the authoritative server")
+    serve.add_argument("-d", "--difficulty", choices=list(DIFFICULTIES), default="Medium")
+    serve.add_argument("--seed", type=int)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=PORT)
+    bot = sub.add_parser("bot", help="join with a headless random player")
+    bot.add_argument("--host", default="127.0.0.1")
+    bot.add_argument("--port", type=int, default=PORT)
+    bot.add_argument("--seconds", type=float, default=60.0)
+    bot.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    if args.cmd == "serve":
+        server = CoopServer(args.difficulty, args.seed)
+        try:
+            state = asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            return 0
+        result = "Game over" if state.game_state == "gameover" else "Everyone left"
+        print(f"{result}: score {state.score} after {state.tick / TICK_HZ:.1f}s ({server.ticks_late} late ticks)")
+    else:
+        run_bot(args.host, args.port, args.seconds, args.seed)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# profiler.py - per-phase frame timings
+#
+# The main loop calls mark(phase) after each phase; the time since the
+# previous mark is charged to that phase. Rolling frame times feed the F3
+# overlay, and with --profile every frame's sample is kept and written out
+# (CSV or JSON, by file extension) when the game exits.
+import csv
+import json
+import time
+from collections import deque
+
+PHASES = ("events", "input", "explosions", "bullets", "enemies", "collision",
+          "boss", "render", "hud", "display", "capture", "tick_wait")
+
+class FrameProfiler:
+    def __init__(self, window=300, keep_samples=False):
+        self.frame_ms = deque(maxlen=window)
+        self.phase_ms = {p: deque(maxlen=window) for p in PHASES}
+        self.samples = [] if keep_samples else None
+        self._current = dict.fromkeys(PHASES, 0.0)
+        self._start = self._last = time.perf_counter()
+
+    def begin_frame(self):
+        for p in PHASES:
+            self._current[p] = 0.0
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self._current[phase] += (now - self._last) * 1000.0
+        self._last = now
+
+    def end_frame(self):
+        total = (self._last - self._start) * 1000.0
+        self.frame_ms.append(total)
+        for p in PHASES:
+            self.phase_ms[p].append(self._current[p])
+        if self.samples is not None:
+            row = dict(self._current)
+            row["frame"] = total
+            self.samples.append(row)
+
+    def percentiles(self):
+        # (p50, p95, p99) over the rolling window, in ms
+        data = sorted(self.frame_ms)
+        if not data:
+            return 0.0, 0.0, 0.0
+        pick = lambda q: data[min(len(data) - 1, int(q * len(data)))]
+        return pick(0.50), pick(0.95), pick(0.99)
+
+    def phase_means(self):
+        return {p: (sum(v) / len(v) if v else 0.0) for p, v in self.phase_ms.items()}
+
+    def dump(self, path):
+        rows = self.samples or []
+        if path.lower().endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"phases": list(PHASES), "frames": rows}, f)
+        else:
+            with open(path, "w", newline="") as f:
+                w = csv.DictWriter(f, fieldnames=["frame"] + list(PHASES))
+                w.writeheader()
+                w.writerows(rows)
+
+class NullProfiler:
+    # stands in when nobody is measuring; mark() costs one method call
+    def mark(self, phase):
+        pass
+
+NO_PROFILE = NullProfiler()
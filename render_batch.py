@@ -0,0 +1,37 @@
+# render_batch.py - batched sprite submission
+#
+# Draws are queued per layer as (surface, pos) or (surface, pos, area) tuples
+# and handed to the target in one Surface.blits() call per layer - fblits() on
+# pygame-ce when no rects are needed - instead of one blit() per sprite.
+import pygame
+
+HAVE_FBLITS = hasattr(pygame.Surface, "fblits")
+
+class SpriteBatch:
+    def __init__(self, layers):
+        self.layers = {name: [] for name in layers}  # flushed in this order
+        self._with_area = set()  # layers holding (surface, pos, area) entries
+
+    def add(self, layer, img, pos, area=None):
+        if area is None:
+            self.layers[layer].append((img, pos))
+        else:
+            self.layers[layer].append((img, pos, area))
+            self._with_area.add(layer)
+
+    def extend(self, layer, items):
+        self.layers[layer].extend(items)
+
+    def flush(self, surf, rects=None):
+        # rects: list to extend with the areas drawn (for dirty rects), or None
+        for name, seq in self.layers.items():
+            if not seq:
+                continue
+            if rects is not None:
+                rects.extend(surf.blits(seq))
+            elif HAVE_FBLITS and name not in self._with_area:
+                surf.fblits(seq)
+            else:
+                surf.blits(seq, False)
+            seq.clear()
+        self._with_area.clear()
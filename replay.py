@@ -0,0 +1,91 @@
+# replay.py - deterministic input recording and fast-forward replay
+#
+# A recording is the run's seed and difficulty plus one input bitmask byte
+# per simulation tick (zlib-compressed). Because all randomness comes from
+# the seeded GameState.rng, feeding the same bytes back into step() replays
+# the session exactly.
+#
+#   python spaceinvador.py --record run.sirec            # play and record
+#   python spaceinvador.py --replay run.sirec [--uncapped]
+#   python replay.py run.sirec                           # headless, as fast as possible
+import argparse
+import struct
+import sys
+import time
+import zlib
+
+from game_core import GameState, step, DIFFICULTIES, EXPLOSION_TICKS
+
+MAGIC = b"SIREC1"
+# magic, difficulty index, seed, explosion ticks, tick count, final score
+HEADER = struct.Struct("<6sBQHIi")
+
+class Recording:
+    def __init__(self, difficulty, seed, explosion_ticks=EXPLOSION_TICKS):
+        self.difficulty = difficulty
+        self.seed = seed
+        self.explosion_ticks = explosion_ticks
+        self.inputs = bytearray()
+        self.final_score = -1  # unknown until the run ends
+
+    @classmethod
+    def for_state(cls, state):
+        return cls(state.difficulty, state.seed, state.explosion_ticks)
+
+    def record(self, inputs):
+        self.inputs.append(inputs)
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def new_state(self):
+        return GameState(self.difficulty, seed=self.seed, explosion_ticks=self.explosion_ticks)
+
+    def save(self, path):
+        diff = list(DIFFICULTIES).index(self.difficulty)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, diff, self.seed, self.explosion_ticks,
+                                len(self.inputs), self.final_score))
+            f.write(zlib.compress(bytes(self.inputs), 9))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, diff, seed, ticks, n, score = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Space Invader recording")
+        rec = cls(list(DIFFICULTIES)[diff], seed, ticks)
+        rec.inputs = bytearray(zlib.decompress(data[HEADER.size:]))
+        if len(rec.inputs) != n:
+            raise ValueError(f"{path} is truncated ({len(rec.inputs)} of {n} ticks)")
+        rec.final_score = score
+        return rec
+
+def run_headless(rec):
+    # replay every recorded tick with no rendering or frame cap
+    state = rec.new_state()
+    for inputs in rec.inputs:
+        step(state, inputs)
+    return state
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fast-forward a Space Invader recording headlessly")
+    parser.add_argument("recording")
+    args = parser.parse_args(argv)
+
+    rec = Recording.load(args.recording)
+    start = time.perf_counter()
+    state = run_headless(rec)
+    elapsed = time.perf_counter() - start
+    tps = len(rec) / elapsed if elapsed > 0 else float("inf")
+    print(f"{rec.difficulty}, seed {rec.seed}: {len(rec)} ticks in {elapsed:.3f}s "
+          f"({tps:.0f} ticks/s, {tps / 60:.0f}x real time)")
+    print(f"final score {state.score}, lives {state.lives}, state {state.game_state}")
+    if rec.final_score >= 0 and state.score != rec.final_score:
+        print(f"MISMATCH: recording ended with score {rec.final_score}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# savestate.py - compact binary save-states and a rewind ring buffer
+#
+# encode() packs a whole GameState (scalars, boss, RNG state and the raw
+# arrays of every entity store, free lists included) into a few hundred bytes;
+# decode() rebuilds a state that continues exactly like the original would.
+#
+# RewindBuffer keeps one snapshot per second. Only the newest is stored whole;
+# each older one is the zlib'd XOR against its newer neighbour, which is mostly
+# zeros, so minutes of history fit in well under a megabyte and evicting the
+# oldest entry is just dropping it.
+import struct
+import zlib
+from collections import deque
+
+import numpy as np
+
+from entities import EntityStore, ExplosionPool
+from game_core import GameState, DIFFICULTIES
+
+MAGIC = b"SIST1"
+GAME_STATES = ("playing", "boss", "gameover")
+# magic, difficulty, game state, boss active, has boss, players, player x/y, ally x, score, hp, lives,
+# next boss score, seed, tick, explosion ticks, speed_mul, enemy_count, bullet_limit, boss_hp,
+# formation cols/rows, boss sprite/x/y/speed/hp, has swarm, swarm x/y/dx/left/right/front,
+# PCG64 state/inc/has_uint32/uinteger
+HEADER = struct.Struct("<5sBBBBBiiiiiiqQIHdiiiHHBdddiBddbHHH16s16sBI")
+STORE = struct.Struct("<III")  # capacity, free slots, live count
+
+def _encode_store(store):
+    parts = [STORE.pack(store.capacity, store._nfree, store.count)]
+    for name in store.FIELDS:
+        parts.append(getattr(store, name).tobytes())
+    parts.append(store.alive.tobytes())
+    parts.append(store._free[:store._nfree].astype(np.int32).tobytes())
+    return b"".join(parts)
+
+def _decode_store(cls, data, pos):
+    cap, nfree, count = STORE.unpack_from(data, pos)
+    pos += STORE.size
+    store = cls.__new__(cls)
+    for name, dtype in cls.FIELDS.items():
+        arr = np.frombuffer(data, dtype=dtype, count=cap, offset=pos).copy()
+        setattr(store, name, arr)
+        pos += arr.nbytes
+    store.alive = np.frombuffer(data, dtype=bool, count=cap, offset=pos).copy()
+    pos += cap
+    store._free = np.zeros(cap, dtype=np.intp)
+    store._free[:nfree] = np.frombuffer(data, dtype=np.int32, count=nfree, offset=pos)
+    pos += 4 * nfree
+    store._nfree = nfree
+    store.count = count
+    return store, pos
+
+def encode(state):
+    rng = state.rng.bit_generator.state
+    if rng["bit_generator"] != "PCG64":
+        raise ValueError("only PCG64 generators can be saved")
+    cfg = state.config
+    boss = state.boss or {'sprite': 0, 'x': 0, 'y': 0, 'speed': 0, 'hp': 0}
+    swarm = state.swarm or {'x': 0, 'y': 0, 'dx': 0, 'left': 0, 'right': 0, 'front': 0}
+    cols, rows = cfg.get('formation') or (0, 0)
+    head = HEADER.pack(
+        MAGIC, list(DIFFICULTIES).index(state.difficulty), GAME_STATES.index(state.game_state),
+        state.boss_active, state.boss is not None, state.players,
+        state.player_x, state.player_y, state.ally_x or 0, state.score, state.player_hp, state.lives,
+        state.next_boss_score, state.seed, state.tick, state.explosion_ticks,
+        cfg['speed_mul'], cfg['enemy_count'], cfg['bullet_limit'], cfg['boss_hp'], cols, rows,
+        boss['sprite'], boss['x'], boss['y'], boss['speed'], boss['hp'],
+        state.swarm is not None, swarm['x'], swarm['y'], swarm['dx'], swarm['left'], swarm['right'], swarm['front'],
+        rng["state"]["state"].to_bytes(16, "little"), rng["state"]["inc"].to_bytes(16, "little"),
+        rng["has_uint32"], rng["uinteger"])
+    return head + _encode_store(state.bullets) + _encode_store(state.enemies) + _encode_store(state.explosions)
+
+def decode(data):
+    (magic, diff, game_state, boss_active, has_boss, players, player_x, player_y, ally_x, score, hp, lives,
+     next_boss, seed, tick, explosion_ticks, speed_mul, enemy_count, bullet_limit, boss_hp, cols, rows,
+     b_sprite, b_x, b_y, b_speed, b_hp, has_swarm, s_x, s_y, s_dx, s_left, s_right, s_front,
+     rng_state, rng_inc, has_uint32, uinteger) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a Space Invader save-state")
+    # filled in directly rather than through __init__, which would roll a fresh wave
+    state = GameState.__new__(GameState)
+    state.difficulty = list(DIFFICULTIES)[diff]
+    state.players = players
+    state.config = {"speed_mul": speed_mul, "enemy_count": enemy_count,
+                    "bullet_limit": bullet_limit, "boss_hp": boss_hp}
+    if cols:
+        state.config["formation"] = (cols, rows)
+    state.seed = seed
+    state.rng = np.random.default_rng()
+    state.rng.bit_generator.state = {
+        "bit_generator": "PCG64",
+        "state": {"state": int.from_bytes(rng_state, "little"), "inc": int.from_bytes(rng_inc, "little")},
+        "has_uint32": has_uint32, "uinteger": uinteger,
+    }
+    state.explosion_ticks = explosion_ticks
+    state.game_state = GAME_STATES[game_state]
+    state.player_x, state.player_y = player_x, player_y
+    state.ally_x = ally_x if players == 2 else None
+    state.score, state.player_hp, state.lives = score, hp, lives
+    state.boss_active = bool(boss_active)
+    state.boss = {'sprite': b_sprite, 'x': b_x, 'y': b_y, 'speed': b_speed, 'hp': b_hp} if has_boss else None
+    state.swarm = {'x': s_x, 'y': s_y, 'dx': s_dx, 'left': s_left, 'right': s_right,
+                   'front': s_front} if has_swarm else None
+    state.next_boss_score = next_boss
+    state.tick = tick
+    state.events = []
+    pos = HEADER.size
+    state.bullets, pos = _decode_store(EntityStore, data, pos)
+    state.enemies, pos = _decode_store(EntityStore, data, pos)
+    state.explosions, pos = _decode_store(ExplosionPool, data, pos)
+    return state
+
+def xor_bytes(a, b):
+    return np.bitwise_xor(np.frombuffer(a, dtype=np.uint8), np.frombuffer(b, dtype=np.uint8)).tobytes()
+
+class RewindBuffer:
+    def __init__(self, seconds=300, interval=60):
+        self.interval = interval  # ticks between snapshots
+        self.history = deque(maxlen=seconds)  # (tick, is_delta, blob), oldest first
+        self.latest = None
+        self.latest_tick = -1
+
+    def __len__(self):
+        return len(self.history) + (self.latest is not None)
+
+    def nbytes(self):
+        return len(self.latest or b"") + sum(len(blob) for _, _, blob in self.history)
+
+    def maybe_push(self, state):
+        if state.tick % self.interval == 0 and state.tick != self.latest_tick:
+            self.push(state)
+
+    def push(self, state):
+        data = encode(state)
+        if self.latest is not None:
+            if len(self.latest) == len(data):
+                self.history.append((self.latest_tick, True, zlib.compress(xor_bytes(self.latest, data))))
+            else:  # a store grew; keep this one whole
+                self.history.append((self.latest_tick, False, zlib.compress(self.latest)))
+        self.latest, self.latest_tick = data, state.tick
+
+    def rewind_to(self, tick):
+        # newest snapshot at or before `tick` (or the oldest one kept); later ones are dropped
+        if self.latest is None:
+            return None
+        while self.latest_tick > tick and self.history:
+            self.latest_tick, is_delta, blob = self.history.pop()
+            blob = zlib.decompress(blob)
+            self.latest = xor_bytes(self.latest, blob) if is_delta else blob
+        return decode(self.latest)
+
+    def clear(self):
+        self.history.clear()
+        self.latest = None
+        self.latest_tick = -1
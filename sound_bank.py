@@ -0,0 +1,110 @@
+# sound_bank.py - sound effects synthesized in memory
+#
+# Replaces generate_sounds.py + reading shoot.wav/explosion.wav back in: every
+# effect is a small NumPy recipe rendered straight into a mixer.Sound buffer.
+# Sounds are memoized by (recipe, parameters) in an LRU, so pitch variations
+# stay cheap to replay while the number of live buffers stays bounded.
+# VoiceManager caps how many of them play at once.
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+def tone(rate, freq, duration=0.15, volume=0.5, sweep=1.0):
+    # sine at `freq`, gliding to freq * sweep over the duration
+    t = np.arange(int(rate * duration)) / rate
+    f = freq * sweep ** (t / duration)
+    wave = np.sin(2 * np.pi * np.cumsum(f) / rate)
+    fade = np.minimum(1.0, (duration - t) * 200)  # no click at the end
+    return wave * fade * volume
+
+def noise_burst(rate, duration=0.4, decay=5.0, volume=0.7, smooth=1, seed=0):
+    # white noise fading out; `smooth` > 1 low-passes it for a deeper rumble
+    t = np.arange(int(rate * duration)) / rate
+    noise = np.random.default_rng(seed).normal(0, 1, len(t))
+    if smooth > 1:
+        noise = np.convolve(noise, np.ones(smooth) / np.sqrt(smooth), mode="same")
+    return np.clip(noise * np.exp(-decay * t) * volume, -1.0, 1.0)
+
+SYNTHS = {"tone": tone, "noise": noise_burst}
+
+class SoundBank:
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._sounds = OrderedDict()  # (recipe, params) -> Sound, oldest first
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, recipe, *params):
+        key = (recipe,) + params
+        snd = self._sounds.get(key)
+        if snd is not None:
+            self._sounds.move_to_end(key)
+            self.hits += 1
+            return snd
+        self.misses += 1
+        snd = self._make(recipe, params)
+        self._sounds[key] = snd
+        if len(self._sounds) > self.max_entries:
+            self._sounds.popitem(last=False)
+        return snd
+
+    def _make(self, recipe, params):
+        # raises pygame.error when the mixer isn't initialised
+        rate, fmt, channels = pygame.mixer.get_init() or (None, None, None)
+        if rate is None:
+            raise pygame.error("mixer not initialized")
+        wave = SYNTHS[recipe](rate, *params)
+        if fmt == 32:
+            samples = wave.astype(np.float32)
+        else:
+            samples = (wave * (2**15 - 1)).astype(np.int16)
+        if channels > 1:
+            samples = np.repeat(samples[:, None], channels, axis=1)
+        return pygame.sndarray.make_sound(np.ascontiguousarray(samples))
+
+    def clear(self):
+        self._sounds.clear()
+
+# groups: {name: (channels, min_interval_s)}. A group never uses more than its
+# own channels, so their sum is the voice cap. A cue sooner than min_interval_s
+# after the group's last one is dropped; if every channel of the group is busy
+# the oldest voice is cut for the new one.
+class VoiceManager:
+    def __init__(self, groups, clock=time.perf_counter):
+        self.clock = clock
+        self.max_voices = sum(n for n, _ in groups.values())
+        pygame.mixer.set_num_channels(self.max_voices)
+        pygame.mixer.set_reserved(self.max_voices)  # Sound.play() can't grab ours
+        self.groups = {}
+        first = 0
+        for name, (n, interval) in groups.items():
+            chans = [pygame.mixer.Channel(first + i) for i in range(n)]
+            self.groups[name] = (chans, interval)
+            first += n
+        self._started = {}  # channel -> start time
+        self._last = dict.fromkeys(self.groups, float("-inf"))
+        self.played = self.dropped = self.stolen = 0
+
+    def play(self, group, sound):
+        chans, interval = self.groups[group]
+        now = self.clock()
+        if now - self._last[group] < interval:
+            self.dropped += 1
+            return None
+        for ch in chans:
+            if not ch.get_busy():
+                break
+        else:
+            ch = min(chans, key=lambda c: self._started.get(c, 0.0))
+            ch.stop()
+            self.stolen += 1
+        ch.play(sound)
+        self._started[ch] = now
+        self._last[group] = now
+        self.played += 1
+        return ch
+
+    def busy(self):
+        return sum(ch.get_busy() for chans, _ in self.groups.values() for ch in chans)
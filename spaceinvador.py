@@ -1,51 +1,86 @@
 # spaceinvador.py  - Full updated version
+import argparse
 import pygame
+import numpy as np
 import random
 import sys
 import time
 import os
+STARTUP_T0 = time.perf_counter()
+from game_core import (
+    GameState, step, DIFFICULTIES, BOSS_W, BOSS_H, ENEMY_H, SWARM_W, SWARM_H,
+    INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE, EXPLOSION_TICKS,
+    SCREEN_WIDTH, SCREEN_HEIGHT,
+)
+from text_cache import TextCache, DigitAtlas
+from dirty_rects import DirtyRects
+from profiler import FrameProfiler, NO_PROFILE
+from replay import Recording
+from asset_cache import load_atlas, safe_image_load
+from loader import BackgroundLoader
+from sound_bank import SoundBank, VoiceManager
+from leaderboard import Leaderboard
+from render_batch import SpriteBatch
+from particles import ParticleSystem
+from savestate import RewindBuffer
+from netplay import CoopClient, PORT as COOP_PORT
+from capture import FrameCapture
 
 # ---------------------------
 # AUDIO & PYGAME INITIALIZE
 # ---------------------------
 pygame.mixer.pre_init(44100, -16, 2, 512)
-pygame.init()
-try:
-    pygame.mixer.init()
-except Exception as e:
-    print("Warning: pygame.mixer.init() failed:", e)
-
-def safe_load_sound(path):
+# only what the first frame needs; the mixer is opened by the background loader
+pygame.display.init()
+pygame.font.init()
+
+# sound effects are synthesized in memory (sound_bank.py); values below already
+# include the old 0.6 effect volume. Enemy kills are pitched by alien type.
+SFX = {
+    "shoot":          ("tone", 800, 0.15, 0.3, 0.85),
+    "explosion":      ("noise", 0.4, 5.0, 0.42),
+    "explosion0":     ("noise", 0.3, 7.0, 0.42, 1, 0),
+    "explosion1":     ("noise", 0.4, 5.0, 0.42, 3, 1),
+    "explosion2":     ("noise", 0.5, 4.0, 0.48, 7, 2),
+    "boss_explosion": ("noise", 1.0, 2.5, 0.54, 15, 3),
+}
+SHOOT_DETUNE = (0.96, 1.0, 1.04)
+# channel group -> (voices, min re-trigger interval in s); 10 voices in total
+VOICE_GROUPS = {"shoot": (3, 0.06), "explosion": (5, 0.03), "boss": (2, 0.1)}
+SFX_GROUP = {"shoot": "shoot", "boss_explosion": "boss"}  # anything else: "explosion"
+sound_bank = SoundBank()
+voices = None  # VoiceManager once the mixer is up
+
+def load_audio():
+    try:
+        pygame.mixer.init()
+    except Exception as e:
+        print("Warning: pygame.mixer.init() failed:", e)
+        return None
+    # render every cue up front so the first shot doesn't synthesize mid-frame
+    for recipe in SFX.values():
+        sound_bank.get(*recipe)
+    for d in SHOOT_DETUNE:
+        sound_bank.get(*shoot_recipe(d))
+    return VoiceManager(VOICE_GROUPS)
+
+def shoot_recipe(detune):
+    kind, freq, *rest = SFX["shoot"]
+    return (kind, freq * detune, *rest)
+
+def start_music():
+    # background music optional
     try:
-        snd = pygame.mixer.Sound(path)
-        return snd
+        pygame.mixer.music.load("background_music.mpeg")
+        pygame.mixer.music.set_volume(0.45)
+        pygame.mixer.music.play(-1)
     except Exception as e:
-        # Return dummy object with same interface
-        print(f"Sound load failed for '{path}': {e}")
-        class DummySound:
-            def play(self): pass
-            def set_volume(self, v): pass
-        return DummySound()
-
-shoot_sound = safe_load_sound("shoot.wav")
-explosion_sound = safe_load_sound("explosion.wav")
-shoot_sound.set_volume(0.6)
-explosion_sound.set_volume(0.6)
-
-# background music optional
-try:
-    pygame.mixer.music.load("background_music.mpeg")
-    pygame.mixer.music.set_volume(0.45)
-    pygame.mixer.music.play(-1)
-except Exception as e:
-    # ignore if missing
-    print("Background music not loaded:", e)
+        # ignore if missing
+        print("Background music not loaded:", e)
 
 # ---------------------------
 # SCREEN & CONSTANTS
 # ---------------------------
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Space Invader")
 
@@ -53,47 +88,138 @@ BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 
 # ---------------------------
-# ASSET LOADING (safe)
+# ASSET LOADING (safe, cached)
 # ---------------------------
-def safe_image_load(path, size=None):
-    try:
-        im = pygame.image.load(path).convert_alpha()
-        if size:
-            im = pygame.transform.scale(im, size)
-        return im
-    except Exception as e:
-        # placeholder surface
-        print(f"Image '{path}' missing: {e}")
-        placeholder = pygame.Surface(size if size else (50, 30), pygame.SRCALPHA)
-        placeholder.fill((100, 100, 120))
-        return placeholder
-
-player_img = safe_image_load("tank.png", (60, 40))
+ASSET_CACHE_FILE = "asset_cache.bin"
+ASSET_CACHE_VERSION = 2  # bump when sprite sizes or the procedural explosion change
+
+def render_procedural_explosion():
+    # pre-render the 6 expanding rings of every t step into one surface per tick,
+    # composited the same way the per-frame ring blits used to land on screen
+    seq = []
+    maxr = 40
+    steps = 6
+    for t in range(EXPLOSION_TICKS):
+        rings = []
+        for k in range(steps):
+            r = int((t/6.0) * maxr * (1 + k*0.12))
+            alpha = max(0, 220 - t*30 - k*20)
+            if r > 0 and alpha > 0:
+                # ring colour alpha and surface alpha both applied -> alpha^2
+                rings.append((r, (255, 160 - k*20, 60), (alpha / 255.0) ** 2))
+        R = max([r for r, _, _ in rings], default=0)
+        img = pygame.Surface((R*2, R*2), pygame.SRCALPHA)
+        if rings:
+            c = np.arange(R*2) + 0.5 - R
+            d2 = c[:, None]**2 + c[None, :]**2
+            rgb = np.zeros((R*2, R*2, 3))
+            a = np.zeros((R*2, R*2))
+            for r, col, ra in rings:
+                m = (d2 <= r*r) * ra
+                rgb = rgb * (1 - m[..., None]) + np.array(col) * m[..., None]
+                a = a * (1 - m) + m
+            px = pygame.surfarray.pixels3d(img)
+            px[...] = (rgb / np.maximum(a, 1e-6)[..., None]).astype(np.uint8)
+            del px
+            pa = pygame.surfarray.pixels_alpha(img)
+            pa[...] = (a * 255).astype(np.uint8)
+            del pa
+        # rings are centred on (x+16, y+8) of the explosion
+        seq.append((img, (16 - R, 8 - R)))
+    return seq
+
+def find_explosion_files():
+    # explode1.png, explode2.png, ... from one directory listing
+    names = {}
+    for fname in os.listdir("."):
+        stem = fname[len("explode"):-len(".png")]
+        if fname.startswith("explode") and fname.endswith(".png") and stem.isdigit():
+            names[int(stem)] = fname
+    files = []
+    i = 1
+    while i in names:
+        files.append(names[i])
+        i += 1
+    return files
+
+explosion_files = find_explosion_files()
+USE_PROCEDURAL_EXPLOSION = (len(explosion_files) == 0)
+
+def build_sprites():
+    sprites = {"player": safe_image_load("tank.png", (60, 40))}
+    for n in (1, 2, 3):
+        alien = safe_image_load(f"alien{n}.png", (48,36))
+        sprites[f"alien{n}"] = alien
+        # boss is the scaled-up alien sprite, prepared once instead of per spawn
+        sprites[f"boss{n}"] = pygame.transform.scale(alien, (BOSS_W, BOSS_H))
+        sprites[f"swarm{n}"] = pygame.transform.smoothscale(alien, (SWARM_W, SWARM_H))
+    for n, fname in enumerate(explosion_files):
+        try:
+            sprites[f"explode{n}"] = pygame.image.load(fname).convert_alpha()
+        except Exception as e:
+            print("Failed to load", fname, e)
+    if USE_PROCEDURAL_EXPLOSION:
+        for t, (img, _) in enumerate(render_procedural_explosion()):
+            sprites[f"proc{t}"] = img
+    return sprites
+
+def load_sprites():
+    t0 = time.perf_counter()
+    sprites, hit = load_atlas(
+        ASSET_CACHE_FILE, ["tank.png", "alien1.png", "alien2.png", "alien3.png"] + explosion_files,
+        build_sprites, ASSET_CACHE_VERSION)
+    print(f"Assets loaded in {(time.perf_counter() - t0) * 1000:.1f} ms "
+          f"({'cache hit' if hit else 'cache rebuilt'})")
+    return sprites
+
+def placeholder(size, color=(100, 100, 120)):
+    surf = pygame.Surface(size, pygame.SRCALPHA)
+    surf.fill(color)
+    return surf
+
+# placeholders until the loader is done; the lists are refilled in place
+player_img = placeholder((60, 40))
 bullet_img = pygame.Surface((7, 18), pygame.SRCALPHA)
 pygame.draw.rect(bullet_img, (255, 255, 0), (0,0,7,18))
 
-enemy_imgs = [
-    safe_image_load("alien1.png", (48,36)),
-    safe_image_load("alien2.png", (48,36)),
-    safe_image_load("alien3.png", (48,36))
-]
-
-# explosion frames if provided
+enemy_imgs = [placeholder((48, 36)) for _ in range(3)]
+swarm_imgs = [placeholder((SWARM_W, SWARM_H)) for _ in range(3)]
+boss_imgs = [placeholder((BOSS_W, BOSS_H)) for _ in range(3)]
 explosion_frames = []
-i = 1
-while True:
-    fname = f"explode{i}.png"
-    if os.path.exists(fname):
-        try:
-            img = pygame.image.load(fname).convert_alpha()
-            explosion_frames.append(img)
-        except Exception as e:
-            print("Failed to load", fname, e)
-        i += 1
+
+# one (surface, offset) per tick of an explosion's life; both paths share it
+n_ticks = EXPLOSION_TICKS if USE_PROCEDURAL_EXPLOSION else 4 * len(explosion_files)
+explosion_sequence = [(placeholder((1, 1), (0, 0, 0, 0)), (0, 0))] * n_ticks
+
+def apply_assets(results):
+    # main thread only: swap loaded assets in for the placeholders
+    global player_img, voices
+    voices = results.get("audio")
+    sprites = results.get("sprites")
+    if not sprites:
+        return
+    player_img = sprites["player"]
+    enemy_imgs[:] = [sprites["alien1"], sprites["alien2"], sprites["alien3"]]
+    swarm_imgs[:] = [sprites["swarm1"], sprites["swarm2"], sprites["swarm3"]]
+    boss_imgs[:] = [sprites["boss1"], sprites["boss2"], sprites["boss3"]]
+    explosion_frames[:] = [sprites[f"explode{n}"] for n in range(len(explosion_files)) if f"explode{n}" in sprites]
+    if USE_PROCEDURAL_EXPLOSION:
+        # rings are centred on (x+16, y+8) of the explosion
+        seq = []
+        for t in range(EXPLOSION_TICKS):
+            img = sprites[f"proc{t}"]
+            R = img.get_width() // 2
+            seq.append((img, (16 - R, 8 - R)))
     else:
-        break
+        seq = [(img, (0, 0)) for img in explosion_frames for _ in range(4)]
+    if len(seq) == len(explosion_sequence):
+        explosion_sequence[:] = seq
 
-USE_PROCEDURAL_EXPLOSION = (len(explosion_frames) == 0)
+loader = BackgroundLoader([
+    ("audio", load_audio),
+    ("sprites", load_sprites),
+    ("music", start_music),
+]).start()
 
 # ---------------------------
 # FONTS
@@ -101,6 +227,13 @@ USE_PROCEDURAL_EXPLOSION = (len(explosion_frames) == 0)
 font = pygame.font.Font(None, 36)
 big_font = pygame.font.Font(None, 72)
 
+# text surfaces are cached by (font, string, colour); HUD numbers use a digit atlas
+text_cache = TextCache()
+hud_digits = DigitAtlas(font, WHITE)
+
+def text(f, s, col=WHITE):
+    return text_cache.render(f, s, col)
+
 # ---------------------------
 # UI / BUTTON CLASS
 # ---------------------------
@@ -119,489 +252,703 @@ class Button:
         else:
             pygame.draw.rect(surf, self.color, self.rect)
             clicked = False
-        txt = font.render(self.text, True, WHITE)
+        txt = text(font, self.text)
         surf.blit(txt, txt.get_rect(center=self.rect.center))
         return clicked
 
 # ---------------------------
 # GAME CONFIG
 # ---------------------------
-DIFFICULTIES = {
-    "Easy":    {"speed_mul": 0.75, "enemy_count": 6,  "bullet_limit": 7},
-    "Medium":  {"speed_mul": 1.0,  "enemy_count": 8,  "bullet_limit": 5},
-    "Hard":    {"speed_mul": 1.4,  "enemy_count": 10, "bullet_limit": 4}
-}
 selected_difficulty = "Medium"
 
 # State variables
-game_state = "menu"  # menu, playing, boss, gameover
-score = 0
-player_hp = 100
-lives = 3
-bullet_speed = 9
-bullets = []
-enemies = []
-boss = None
-boss_active = False
-next_boss_score = 20
-explosions = []  # list of dicts for explosion animations
-
-HIGHSCORE_FILE = "highscore.txt"
-
-def load_high_score():
-    try:
-        with open(HIGHSCORE_FILE, "r") as f:
-            return int(f.read().strip())
-    except:
-        return 0
+game_state = "menu"  # menu, playing, boss, gameover (mirrors state.game_state while in game)
+state = None  # game_core.GameState for the current run
 
-def save_high_score(val):
-    try:
-        with open(HIGHSCORE_FILE, "w") as f:
-            f.write(str(int(val)))
-    except Exception as e:
-        print("Save high score failed:", e)
-
-high_score = load_high_score()
+leaderboard = None  # Leaderboard, opened by main()
+high_score = 0      # best score on any difficulty
+last_run = None     # rank + top entries shown on the game-over screen
+coop = None         # netplay.CoopClient while in a --join game
+capture = None      # capture.FrameCapture with --capture
 
 # ---------------------------
 # HELPER FUNCTIONS
 # ---------------------------
-def create_enemies(count=None):
-    arr = []
-    if count is None:
-        count = DIFFICULTIES[selected_difficulty]["enemy_count"]
-    for _ in range(count):
-        im = random.choice(enemy_imgs)
-        x = random.randint(0, SCREEN_WIDTH - 48)
-        y = random.randint(60, 160)
-        base = random.choice([2,3,4])
-        speed = base * DIFFICULTIES[selected_difficulty]["speed_mul"]
-        arr.append({'img':im, 'x':x, 'y':y, 'speed':speed})
-    return arr
-
-def reset_game():
-    global player_x, player_y, bullets, enemies, score, player_hp, game_over, boss_active, boss, next_boss_score, lives
-    player_x = (SCREEN_WIDTH - 60) // 2
-    player_y = SCREEN_HEIGHT - 70
-    bullets = []
-    enemies = create_enemies()
-    score = 0
-    player_hp = 100
-    lives = 3
-    game_over = False
-    boss_active = False
-    boss = None
-    next_boss_score = 20
-
-def is_collision(x1,y1,x2,y2, threshold=32):
-    dist = ((x1-x2)**2 + (y1-y2)**2)**0.5
-    return dist < threshold
-
-def draw_health_bar(surf, x,y,w,h, hp):
-    pct = max(0, min(100, hp)) / 100.0
-    bw = int(w * pct)
+def reset_game(seed=None):
+    global state
+    state = GameState(selected_difficulty, seed=seed, explosion_ticks=len(explosion_sequence))
+    particles.clear()
+    rewind.clear()
+    rewind.push(state)
+
+def read_inputs():
+    keys = pygame.key.get_pressed()
+    inputs = 0
+    if keys[pygame.K_LEFT]: inputs |= INPUT_LEFT
+    if keys[pygame.K_RIGHT]: inputs |= INPUT_RIGHT
+    if keys[pygame.K_SPACE]: inputs |= INPUT_FIRE
+    return inputs
+
+def play_events(events):
+    if voices is None:
+        return
+    for ev in events:
+        if ev == "shoot":
+            # slight random detune so rapid fire doesn't sound identical
+            snd = sound_bank.get(*shoot_recipe(random.choice(SHOOT_DETUNE)))
+        elif ev in SFX:
+            snd = sound_bank.get(*SFX[ev])
+        else:
+            continue
+        voices.play(SFX_GROUP.get(ev, "explosion"), snd)
+
+# HUD pieces drawn with pygame.draw once, then only blitted
+def make_health_bar(w, h):
+    back = pygame.Surface((w, h)).convert()
+    back.fill((80,80,80))
+    fills = []
+    for col in ((0,200,0), (240,200,0), (200,0,0)):
+        f = pygame.Surface((w, h)).convert()
+        f.fill(col)
+        fills.append(f)
+    border = pygame.Surface((w, h), pygame.SRCALPHA)
+    pygame.draw.rect(border, WHITE, (0,0,w,h), 2)
+    return back, fills, border
+
+def make_heart():
+    # two circles + triangle
+    img = pygame.Surface((25, 25), pygame.SRCALPHA)
+    pygame.draw.circle(img, (220,20,60), (8, 8), 7)
+    pygame.draw.circle(img, (220,20,60), (16, 8), 7)
+    points = [(0, 12), (24, 12), (12, 24)]
+    pygame.draw.polygon(img, (220,20,60), points)
+    pygame.draw.polygon(img, WHITE, points, 1)
+    return img
+
+HEALTH_BAR_W, HEALTH_BAR_H = 220, 20
+health_bar = make_health_bar(HEALTH_BAR_W, HEALTH_BAR_H)
+heart_img = make_heart()
+
+def draw_health_bar(batch, x,y, hp):
+    w, h = HEALTH_BAR_W, HEALTH_BAR_H
+    back, fills, border = health_bar
+    bw = int(w * max(0, min(100, hp)) / 100.0)
     if hp > 70:
-        col = (0,200,0)
+        fill = fills[0]
     elif hp > 30:
-        col = (240,200,0)
+        fill = fills[1]
     else:
-        col = (200,0,0)
-    pygame.draw.rect(surf, (80,80,80), (x,y,w,h))
-    pygame.draw.rect(surf, col, (x,y,bw,h))
-    pygame.draw.rect(surf, WHITE, (x,y,w,h), 2)
-    surf.blit(font.render(f"HP: {int(hp)}", True, WHITE), (x + w + 8, y - 2))
-
-def draw_lives(surf, x,y, count):
-    # draw small hearts
-    for i in range(count):
-        hx = x + i*34
-        # two circles + triangle
-        r = 7
-        pygame.draw.circle(surf, (220,20,60), (hx+8, y+8), r)
-        pygame.draw.circle(surf, (220,20,60), (hx+16, y+8), r)
-        points = [(hx, y+12), (hx+24, y+12), (hx+12, y+24)]
-        pygame.draw.polygon(surf, (220,20,60), points)
-        pygame.draw.polygon(surf, WHITE, points, 1)
-    surf.blit(font.render(f" x {count}", True, WHITE), (x + count*34 + 8, y))
-
-def spawn_boss():
-    global boss
-    bimg = random.choice(enemy_imgs)
-    bimg = pygame.transform.scale(bimg, (140, 100))
-    b = {
-        'img': bimg,
-        'x': (SCREEN_WIDTH - 140)//2,
-        'y': 60,
-        'speed': 3 * DIFFICULTIES[selected_difficulty]['speed_mul'],
-        'hp': 10 if selected_difficulty=="Easy" else (12 if selected_difficulty=="Medium" else 16)
+        fill = fills[2]
+    batch.add("hud", back, (x, y))
+    if bw > 0:
+        batch.add("hud", fill, (x, y), (0, 0, bw, h))
+    batch.add("hud", border, (x, y))
+    # "HP: " label is part of draw_hud_labels()
+    label = text(font, "HP: ")
+    digits, area = hud_digits.blit_seq(hp, (x + w + 8 + label.get_width(), y - 2))
+    batch.extend("hud", digits)
+    return area.union((x, y, w, h))
+
+def draw_lives(batch, x,y, count):
+    # small hearts
+    batch.extend("hud", [(heart_img, (x + i*34, y)) for i in range(count)])
+    label = text(font, " x ")
+    batch.add("hud", label, (x + count*34 + 8, y))
+    digits, area = hud_digits.blit_seq(count, (x + count*34 + 8 + label.get_width(), y))
+    batch.extend("hud", digits)
+    return area.union((x, y, count*34 + 8 + label.get_width(), 25))
+
+# explosion drawing (state.explosions is aged by game_core.step)
+def draw_explosions(batch, explosions):
+    ex = explosions
+    i = ex.indices()
+    seq = explosion_sequence
+    batch.extend("explosions", [(seq[t][0], (x + seq[t][1][0], y + seq[t][1][1]))
+                                for t, x, y in zip(ex.t[i].tolist(), ex.x[i].tolist(), ex.y[i].tolist())])
+
+def draw_hud_labels(surf):
+    # static HUD text, drawn under the sprites (pre-composited in --dirty-rects mode)
+    surf.blit(text(font, "Score: "), (10,10))
+    surf.blit(text(font, "HP: "), (160 + 220 + 8, 10 - 2))
+
+# ---------------------------
+# FIXED TIMESTEP + INTERPOLATION
+# ---------------------------
+SIM_HZ = 60  # game_core speeds are per tick, so the sim always runs at 60 ticks/s
+SIM_DT = 1.0 / SIM_HZ
+MAX_TICKS_PER_FRAME = 5  # catch-up ticks before the frame's render is skipped
+MAX_FRAME_SKIP = 4       # but render at least every 5th frame
+MAX_LAG = 0.25           # backlog beyond this is dropped (window drag, breakpoint)
+TELEPORT = 60            # px; bigger moves (respawns, reused slots) aren't blended
+
+prev_pos = None     # positions before the last tick, see snapshot()
+render_alpha = 1.0  # how far the current frame is between prev_pos and state
+
+def snapshot(state):
+    en, bl = state.enemies, state.bullets
+    return {
+        "player_x": state.player_x,
+        "enemies": (en.x.copy(), en.y.copy(), en.alive.copy()),
+        "bullets": (bl.x.copy(), bl.y.copy(), bl.alive.copy()),
+        "boss_x": state.boss['x'] if state.boss is not None else None,
     }
-    boss = b
-    return b
 
-# explosion helpers
-def add_explosion(x,y):
-    if not USE_PROCEDURAL_EXPLOSION:
-        explosions.append({'type':'frames', 'x':x, 'y':y, 'frame':0, 'tick':0})
+def lerp_store(store, prev, alpha):
+    # entity positions `alpha` of the way from the previous tick to this one
+    px, py, palive = prev
+    x, y = store.x.copy(), store.y.copy()
+    n = min(len(x), len(px))
+    dx, dy = x[:n] - px[:n], y[:n] - py[:n]
+    ok = store.alive[:n] & palive[:n] & (np.abs(dx) < TELEPORT) & (np.abs(dy) < TELEPORT)
+    x[:n][ok] -= dx[ok] * (1.0 - alpha)
+    y[:n][ok] -= dy[ok] * (1.0 - alpha)
+    return x, y
+
+def lerp(prev, cur, alpha):
+    if prev is None or abs(cur - prev) >= TELEPORT:
+        return cur
+    return prev + (cur - prev) * alpha
+
+# sprites are queued per layer and submitted with one blits() call each
+batch = SpriteBatch(("bullets", "enemies", "player", "hud", "explosions"))
+
+# sparks on top of the explosion sprites; purely visual, so they live here and
+# not in game_core
+PARTICLE_BUDGET = 3000
+SPARKS_PER_EXPLOSION = 30
+BOSS_KILL_SPARKS = 400
+particles = ParticleSystem(PARTICLE_BUDGET)
+
+# rewind: a save-state every second (delta-compressed, see savestate.py);
+# BACKSPACE jumps back REWIND_SECONDS
+REWIND_SECONDS = 5
+REWIND_HISTORY = 300  # seconds kept
+rewind = RewindBuffer(REWIND_HISTORY, interval=SIM_HZ)
+
+def rewind_game(seconds=REWIND_SECONDS):
+    global state, prev_pos
+    restored = rewind.rewind_to(state.tick - seconds * SIM_HZ)
+    if restored is None:
+        return False
+    state = restored
+    prev_pos = None  # nothing to blend from
+    particles.clear()
+    return True
+
+def tick_effects(events):
+    # once per sim tick: sounds, sparks for this tick's new explosions, particle motion
+    play_events(events)
+    ex = state.explosions
+    i = ex.indices()
+    burst = BOSS_KILL_SPARKS if "boss_explosion" in events else SPARKS_PER_EXPLOSION
+    for x, y in zip(ex.x[i][ex.t[i] == 0].tolist(), ex.y[i][ex.t[i] == 0].tolist()):
+        particles.emit(x + 16, y + 8, burst)
+    particles.update()
+
+def draw_game(surf, static_hud=True, prof=NO_PROFILE, want_rects=True):
+    # returns the rects touched this frame (used by --dirty-rects; empty unless want_rects)
+    rects = [] if want_rects else None
+    if static_hud:
+        draw_hud_labels(surf)
+    prev = prev_pos if render_alpha < 1.0 else None
+    bl = state.bullets
+    bx, by = lerp_store(bl, prev["bullets"], render_alpha) if prev else (bl.x, bl.y)
+    i = bl.indices()
+    batch.extend("bullets", [(bullet_img, pos) for pos in zip(bx[i].tolist(), by[i].tolist())])
+    boss = state.boss if state.game_state == "boss" else None
+    if boss is not None:
+        boss_x = lerp(prev["boss_x"], boss['x'], render_alpha) if prev else boss['x']
+        batch.add("enemies", boss_imgs[boss['sprite']], (boss_x, boss['y']))
     else:
-        explosions.append({'type':'proc', 'x':x, 'y':y, 't':0})
-
-def update_and_draw_explosions(surf):
-    for e in explosions[:]:
-        if e['type'] == 'frames':
-            idx = e['frame']
-            if idx < len(explosion_frames):
-                img = explosion_frames[idx]
-                surf.blit(img, (e['x'], e['y']))
-            e['tick'] += 1
-            if e['tick'] >= 4:
-                e['frame'] += 1
-                e['tick'] = 0
-            if e['frame'] >= len(explosion_frames):
-                explosions.remove(e)
-        else:
-            t = e['t']
-            maxr = 40
-            steps = 6
-            for k in range(steps):
-                r = int((t/6.0) * maxr * (1 + k*0.12))
-                alpha = max(0, 220 - t*30 - k*20)
-                if r > 0 and alpha > 0:
-                    surf = pygame.Surface((r*2, r*2), pygame.SRCALPHA)
-                    col = (255, 160 - k*20, 60, int(alpha))
-                    pygame.draw.circle(surf, col, (r,r), r)
-                    surf.set_colorkey((0,0,0))
-                    surf.set_alpha(int(alpha))
-                    surf2pos = (e['x'] - r + 16, e['y'] - r + 8)
-                    surf.blit(surf, (0,0))
-                    screen.blit(surf, surf2pos)
-            e['t'] += 1
-            if e['t'] > 8:
-                explosions.remove(e)
+        en = state.enemies
+        ex, ey = lerp_store(en, prev["enemies"], render_alpha) if prev else (en.x, en.y)
+        imgs = swarm_imgs if state.swarm is not None else enemy_imgs
+        i = np.flatnonzero(en.alive & (ey > -ENEMY_H))  # swarm rows not marched in yet are culled
+        batch.extend("enemies", [(imgs[s], (x, y)) for s, x, y
+                                 in zip(en.sprite[i].tolist(), ex[i].tolist(), ey[i].tolist())])
+    player_x = lerp(prev["player_x"], state.player_x, render_alpha) if prev else state.player_x
+    batch.add("player", player_img, (player_x, state.player_y))
+    if state.ally_x is not None:
+        batch.add("player", player_img, (state.ally_x, state.player_y))
+    batch.flush(surf, rects)
+    prof.mark("render")
+    label = text(font, "Score: ")
+    digits, score_area = hud_digits.blit_seq(state.score, (10 + label.get_width(), 10))
+    batch.extend("hud", digits)
+    hp_area = draw_health_bar(batch, 160, 10, state.player_hp)
+    lives_area = draw_lives(batch, 10, 50, state.lives)
+    batch.flush(surf)
+    if boss is not None:
+        # boss HP bar (clear of the HUD, under the explosions)
+        maxhp = state.config['boss_hp']
+        bar = pygame.draw.rect(surf, (100,100,100), (SCREEN_WIDTH//2 - 100, boss['y'] - 20, 200, 12))
+        pygame.draw.rect(surf, (200,0,0), (SCREEN_WIDTH//2 - 100, boss['y'] - 20, int(200 * (boss['hp'] / maxhp)), 12))
+        pygame.draw.rect(surf, WHITE, (SCREEN_WIDTH//2 - 100, boss['y'] - 20, 200, 12), 2)
+        if want_rects:
+            rects.append(bar)
+    if want_rects:
+        rects += [score_area, hp_area, lives_area]
+    prof.mark("hud")
+    draw_explosions(batch, state.explosions)
+    batch.flush(surf, rects)
+    spark_rects = particles.draw(surf)
+    if want_rects:
+        rects += spark_rects
+    prof.mark("explosions")
+    return rects if want_rects else []
+
+# F3 frame-time overlay, re-rendered a few times a second
+overlay_font = pygame.font.Font(None, 22)
+overlay_img = None
+
+def draw_profiler_overlay(surf, frame_no):
+    global overlay_img
+    if overlay_img is None or frame_no % 15 == 0:
+        p50, p95, p99 = profiler.percentiles()
+        lines = [f"frame ms  p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}"]
+        for phase, ms in profiler.phase_means().items():
+            lines.append(f"{phase:<11}{ms:6.2f}")
+        lines.append(f"particles {len(particles)}/{particles.budget}  dropped {particles.dropped}")
+        lines.append(f"rewind {len(rewind)}s  {rewind.nbytes() / 1024:.1f} KB")
+        if coop is not None:
+            lines.append(f"net {coop.stats.describe()}")
+        if capture is not None:
+            lines.append(f"capture {capture.written}/{capture.frames}  dropped {capture.dropped}")
+        if voices is not None:
+            lines.append(f"voices {voices.busy()}/{voices.max_voices}  dropped {voices.dropped}  stolen {voices.stolen}")
+        h = overlay_font.get_linesize()
+        overlay_img = pygame.Surface((260, h * len(lines) + 8), pygame.SRCALPHA)
+        overlay_img.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            overlay_img.blit(overlay_font.render(line, True, (0,255,120)), (6, 4 + i*h))
+    return surf.blit(overlay_img, (SCREEN_WIDTH - overlay_img.get_width() - 8, 8))
+
+def build_hud_background():
+    # black playfield with the never-changing HUD labels composited once
+    bg = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    bg.fill(BLACK)
+    draw_hud_labels(bg)
+    return bg
+
+def finish_loading(show=True):
+    # progress screen on the main thread until the loader is done, then swap in
+    first_frame = True
+    while show:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+        screen.fill(BLACK)
+        label = text(font, f"Loading {loader.current or ''}...")
+        screen.blit(label, label.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 30)))
+        bar = pygame.Rect(SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2, 300, 20)
+        pygame.draw.rect(screen, (60, 60, 60), bar)
+        pygame.draw.rect(screen, (0, 200, 0), (bar.x, bar.y, int(bar.w * loader.progress()), bar.h))
+        pygame.draw.rect(screen, WHITE, bar, 2)
+        pygame.display.flip()
+        if first_frame:
+            print(f"First frame after {(time.perf_counter() - STARTUP_T0) * 1000:.0f} ms")
+            first_frame = False
+        if loader.wait(1 / 60):
+            break
+    loader.wait()
+    apply_assets(loader.results)
+
+def wait_for_coop(client):
+    # until the server starts the game; returns its first state, or None on quit/disconnect
+    label = text(font, f"Player {client.slot + 1} - waiting for the other player...")
+    while not client.closed.is_set():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return None
+        first, _ = client.latest()
+        if first is not None:
+            return first
+        screen.fill(BLACK)
+        screen.blit(label, label.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2)))
+        pygame.display.flip()
+        clock.tick(30)
+    return None
 
 # ---------------------------
 # INIT
 # ---------------------------
 reset_game()
 clock = pygame.time.Clock()
-running = True
-
-# Menu helper - keyboard driven
-def keyboard_menu():
-    global selected_difficulty, game_state
-    options = ["Start Game", "Instructions", "Difficulty", "Quit"]
-    diff_options = list(DIFFICULTIES.keys())
-    sel = 0
-    in_diff = False
-    diff_sel = diff_options.index(selected_difficulty)
-    while True:
-        # draw menu
-        screen.fill((5,5,30))
-        title = big_font.render("SPACE INVADERS", True, WHITE)
-        screen.blit(title, ((SCREEN_WIDTH - title.get_width())//2, 60))
-        for i,opt in enumerate(options):
-            col = (255,255,0) if i==sel else WHITE
-            screen.blit(font.render(opt, True, col), (320, 220 + i*50))
-        screen.blit(font.render(f"Difficulty: {selected_difficulty}", True, WHITE), (300, 420))
-        screen.blit(font.render(f"High Score: {high_score}", True, (255,215,0)), (10, SCREEN_HEIGHT-40))
-        pygame.display.update()
-        # event handling
-        for ev in pygame.event.get():
-            if ev.type == pygame.QUIT:
-                pygame.quit(); sys.exit()
-            if ev.type == pygame.KEYDOWN:
-                if ev.key == pygame.K_UP:
-                    sel = (sel - 1) % len(options)
-                elif ev.key == pygame.K_DOWN:
-                    sel = (sel + 1) % len(options)
-                elif ev.key == pygame.K_RETURN:
-                    choice = options[sel]
-                    if choice == "Start Game":
-                        return "start"
-                    elif choice == "Instructions":
-                        return "instructions"
-                    elif choice == "Difficulty":
-                        # open difficulty sub-menu
-                        while True:
-                            screen.fill((10,10,40))
-                            screen.blit(big_font.render("Select Difficulty", True, WHITE), ((SCREEN_WIDTH - 380)//2, 80))
-                            for j,d in enumerate(diff_options):
-                                col = (255,255,0) if j==diff_sel else WHITE
-                                screen.blit(font.render(d, True, col), (SCREEN_WIDTH//2 - 60, 200 + j*50))
-                            screen.blit(font.render("Enter=select, Esc=back", True, WHITE), (SCREEN_WIDTH//2 - 120, 420))
-                            pygame.display.update()
-                            for ev2 in pygame.event.get():
-                                if ev2.type == pygame.QUIT:
-                                    pygame.quit(); sys.exit()
-                                if ev2.type == pygame.KEYDOWN:
-                                    if ev2.key == pygame.K_UP:
-                                        diff_sel = (diff_sel -1) % len(diff_options)
-                                    elif ev2.key == pygame.K_DOWN:
-                                        diff_sel = (diff_sel +1) % len(diff_options)
-                                    elif ev2.key == pygame.K_RETURN:
-                                        selected_difficulty = diff_options[diff_sel]
-                                        return "menu"  # return to menu
-                                    elif ev2.key == pygame.K_ESCAPE:
-                                        break
-                            clock.tick(30)
-                    elif choice == "Quit":
-                        pygame.quit(); sys.exit()
-            if ev.type == pygame.MOUSEBUTTONDOWN:
-                mx,my = ev.pos
-                for i,opt in enumerate(options):
-                    rect = pygame.Rect(320, 220 + i*50, 200, 36)
-                    if rect.collidepoint(mx,my):
-                        if opt == "Start Game":
-                            return "start"
-                        elif opt == "Instructions":
-                            return "instructions"
-                        elif opt == "Difficulty":
-                            keys = list(DIFFICULTIES.keys())
-                            idx = keys.index(selected_difficulty)
-                            idx = (idx + 1) % len(keys)
-                            selected_difficulty = keys[idx]
-                        elif opt == "Quit":
-                            pygame.quit(); sys.exit()
-        clock.tick(30)
+profiler = NO_PROFILE
+
+# ---------------------------
+# MENUS (event driven: redrawn only after input, idle in event.wait)
+# ---------------------------
+MENU_SCREENS = ("menu", "difficulty", "instructions", "gameover")
+MENU_IDLE_MS = 1000  # event.wait timeout while nothing happens
+MENU_OPTIONS = ["Start Game", "Instructions", "Difficulty", "Quit"]
+DIFF_OPTIONS = list(DIFFICULTIES.keys())
+INSTRUCTIONS = [
+    "Move: Left / Right arrows",
+    "Shoot: SPACE (limited by difficulty)",
+    "HP: If HP reaches 0 → you lose 1 life (HP resets to 100)",
+    "Lives: Lose all lives → Game Over",
+    "Enemies that reach low screen also cost a life",
+    "Boss appears every 20 points; beat it for +10 points",
+    f"Rewind: BACKSPACE jumps back {REWIND_SECONDS} seconds",
+    "Swarm: one huge formation - stop it before it lands",
+    "Use arrow keys + Enter in menu to change difficulty"
+]
+menu = {"sel": 0, "diff_sel": DIFF_OPTIONS.index(selected_difficulty), "hover": False}
 
-# Buttons (visual secondaries)
-btn_start = Button((SCREEN_WIDTH-200)//2, 200, 200, 50, "Start Game")
-btn_instruct = Button((SCREEN_WIDTH-200)//2, 270, 200, 50, "Instructions")
-btn_diff = Button((SCREEN_WIDTH-200)//2, 340, 200, 50, f"Difficulty: {selected_difficulty}")
-btn_quit = Button((SCREEN_WIDTH-200)//2, 410, 200, 50, "Quit")
 btn_restart = Button((SCREEN_WIDTH-200)//2, SCREEN_HEIGHT//2 + 50, 200, 50, "Restart")
 
+def option_rect(i):
+    return pygame.Rect(320, 220 + i*50, 200, 36)
+
+def draw_menu(surf):
+    surf.fill((5,5,30))
+    title = text(big_font, "SPACE INVADERS")
+    surf.blit(title, ((SCREEN_WIDTH - title.get_width())//2, 60))
+    for i,opt in enumerate(MENU_OPTIONS):
+        col = (255,255,0) if i==menu["sel"] else WHITE
+        surf.blit(text(font, opt, col), option_rect(i))
+    surf.blit(text(font, f"Difficulty: {selected_difficulty}"), (300, 420))
+    surf.blit(text(font, f"High Score: {high_score}", (255,215,0)), (10, SCREEN_HEIGHT-40))
+
+def draw_difficulty(surf):
+    surf.fill((10,10,40))
+    surf.blit(text(big_font, "Select Difficulty"), ((SCREEN_WIDTH - 380)//2, 80))
+    for j,d in enumerate(DIFF_OPTIONS):
+        col = (255,255,0) if j==menu["diff_sel"] else WHITE
+        surf.blit(text(font, d, col), (SCREEN_WIDTH//2 - 60, 200 + j*50))
+    surf.blit(text(font, "Enter=select, Esc=back"), (SCREEN_WIDTH//2 - 120, 420))
+
+def draw_instructions(surf):
+    surf.fill(BLACK)
+    inst_title = text(big_font, "INSTRUCTIONS")
+    surf.blit(inst_title, ((SCREEN_WIDTH - inst_title.get_width())//2, 40))
+    for i, line in enumerate(INSTRUCTIONS):
+        surf.blit(text(font, line), (60, 160 + i*36))
+    surf.blit(text(font, "Press any key or click to return"), ((SCREEN_WIDTH - 360)//2, 520))
+
+def draw_gameover(surf):
+    surf.fill(BLACK)
+    surf.blit(text(big_font, "GAME OVER"), ((SCREEN_WIDTH - 350)//2, SCREEN_HEIGHT//2 - 80))
+    surf.blit(text(font, f"Final Score: {state.score}"), ((SCREEN_WIDTH - 200)//2, SCREEN_HEIGHT//2 - 10))
+    surf.blit(text(font, f"High Score: {max(state.score, high_score)}", (255,215,0)), ((SCREEN_WIDTH - 220)//2, SCREEN_HEIGHT//2 + 30))
+    btn_restart.draw(surf)
+    if last_run is not None:
+        title = text(font, f"Top {len(last_run['top'])} - {selected_difficulty} (you: #{last_run['rank']})")
+        surf.blit(title, ((SCREEN_WIDTH - title.get_width())//2, SCREEN_HEIGHT//2 + 120))
+        for i, (score, mine) in enumerate(last_run["top"]):
+            row = text(font, f"{i + 1}. {score}", (255,255,0) if mine else WHITE)
+            surf.blit(row, ((SCREEN_WIDTH - row.get_width())//2, SCREEN_HEIGHT//2 + 150 + i*28))
+
+def finish_run():
+    # leaderboard entry for the run that just ended; the write happens off-thread
+    global high_score, last_run
+    diff = selected_difficulty
+    rank = leaderboard.rank(diff, state.score)
+    top = [(r["score"], False) for r in leaderboard.top(diff, 5)]
+    top.insert(rank - 1, (state.score, True))
+    last_run = {"rank": rank, "top": top[:5]}
+    leaderboard.submit(diff, state.score, state.tick, (state.next_boss_score - 20) // 20, state.seed)
+    high_score = max(high_score, state.score)
+
+DRAW_SCREEN = {"menu": draw_menu, "difficulty": draw_difficulty,
+               "instructions": draw_instructions, "gameover": draw_gameover}
+
+def choose(option, mouse=False):
+    global selected_difficulty
+    if option == "Start Game":
+        return "start"
+    if option == "Instructions":
+        return "instructions"
+    if option == "Quit":
+        return "quit"
+    if mouse:
+        # clicking Difficulty cycles it in place
+        keys = DIFF_OPTIONS
+        selected_difficulty = keys[(keys.index(selected_difficulty) + 1) % len(keys)]
+        return "menu"
+    menu["diff_sel"] = DIFF_OPTIONS.index(selected_difficulty)
+    return "difficulty"
+
+def menu_event(current, ev):
+    # one input event on a menu screen -> (next screen, or "start"/"quit"; redraw needed)
+    global selected_difficulty
+    key = ev.key if ev.type == pygame.KEYDOWN else None
+    click = ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1
+    if current == "instructions":
+        if key is not None or click:
+            return "menu", True
+    elif current == "difficulty":
+        if key in (pygame.K_UP, pygame.K_DOWN):
+            step_ = -1 if key == pygame.K_UP else 1
+            menu["diff_sel"] = (menu["diff_sel"] + step_) % len(DIFF_OPTIONS)
+            return current, True
+        if key == pygame.K_RETURN:
+            selected_difficulty = DIFF_OPTIONS[menu["diff_sel"]]
+            return "menu", True
+        if key == pygame.K_ESCAPE:
+            return "menu", True
+    elif current == "gameover":
+        if ev.type == pygame.MOUSEMOTION:
+            hover = btn_restart.rect.collidepoint(ev.pos)
+            changed = hover != menu["hover"]
+            menu["hover"] = hover
+            return current, changed
+        if key == pygame.K_RETURN or (click and btn_restart.rect.collidepoint(ev.pos)):
+            return "menu", True
+    else:
+        if key in (pygame.K_UP, pygame.K_DOWN):
+            step_ = -1 if key == pygame.K_UP else 1
+            menu["sel"] = (menu["sel"] + step_) % len(MENU_OPTIONS)
+            return current, True
+        if key == pygame.K_RETURN:
+            return choose(MENU_OPTIONS[menu["sel"]]), True
+        if ev.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN):
+            for i, opt in enumerate(MENU_OPTIONS):
+                if option_rect(i).collidepoint(ev.pos):
+                    if click:
+                        return choose(opt, mouse=True), True
+                    if i != menu["sel"]:
+                        menu["sel"] = i
+                        return current, True
+    return current, False
+
+def wait_events(timeout_ms):
+    # block until input arrives (or the timeout passes); the idle path for menus
+    ev = pygame.event.wait(timeout_ms)
+    if ev.type == pygame.NOEVENT:
+        return []
+    return [ev] + pygame.event.get()
+
 # ---------------------------
 # MAIN LOOP
 # ---------------------------
-while running:
-    screen.fill(BLACK)
-    # main event handling (non-blocking)
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Space Invader")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="repaint only the regions that changed each frame (faster on low-end machines)")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write per-frame phase timings to FILE (.csv or .json) on exit")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record the seed and per-tick inputs of each game to FILE (latest game wins)")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="replay a recording instead of reading the keyboard, then exit")
+    parser.add_argument("--fps", type=int, default=60,
+                        help="render frame rate cap, 0 = unlimited (the simulation always runs at 60 ticks/s)")
+    parser.add_argument("--uncapped", action="store_true",
+                        help="same as --fps 0; with --replay, also run one tick per frame as fast as possible")
+    parser.add_argument("--join", metavar="HOST[:PORT]",
+                        help=f"join a co-op game run by netplay.py serve (default port {COOP_PORT})")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="save every rendered frame: PATH.raw for one raw BGRX stream, otherwise a directory of PNGs")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global game_state, high_score, leaderboard, profiler, selected_difficulty, state, prev_pos, render_alpha, coop, capture
+    args = parse_args(argv)
+    leaderboard = Leaderboard()
+    high_score = leaderboard.best()
+    fps = 0 if args.uncapped else args.fps
+    running = True
+    dirty = DirtyRects(screen, build_hud_background()) if args.dirty_rects else None
+    profiler = FrameProfiler(keep_samples=bool(args.profile))
+    show_profiler = False
+    frame_no = 0
+    lag = 0.0
+    last_time = None  # reset whenever a game starts, so menu time isn't simulated
+    skipped = 0       # consecutive render frames skipped
+    frames_skipped = 0
+
+    recording = None
+    replaying = Recording.load(args.replay) if args.replay else None
+    replay_pos = 0
+    if replaying is not None:
+        # skip the menu and start the recorded run
+        selected_difficulty = replaying.difficulty
+        state = replaying.new_state()
+        game_state = "playing"
+        replay_start = time.perf_counter()
+    lockstep = replaying is not None and args.uncapped
+
+    finish_loading()
+    print(f"Startup took {(time.perf_counter() - STARTUP_T0) * 1000:.0f} ms")
+    if args.capture:
+        capture = FrameCapture(args.capture, screen.get_size(), fps=args.fps or SIM_HZ)
+    if args.join:
+        # co-op: the server runs the simulation, this loop only sends inputs and draws
+        host, _, port = args.join.partition(":")
+        try:
+            coop = CoopClient(host, int(port or COOP_PORT)).start()
+        except (ConnectionError, ValueError) as e:
+            print("Could not join:", e)
             running = False
-
-    if game_state == "menu":
-        action = keyboard_menu()
-        if action == "start":
-            reset_game()
-            game_state = "playing"
-        elif action == "instructions":
-            # show instructions screen until key or click
-            showing = True
-            while showing:
-                for ev in pygame.event.get():
-                    if ev.type == pygame.QUIT:
-                        running = False; showing = False
-                    if ev.type == pygame.KEYDOWN or (ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1):
-                        showing = False
+        else:
+            state = wait_for_coop(coop)
+            running = state is not None
+            if running:
+                selected_difficulty = state.difficulty
+                game_state = "playing"
+                render_alpha = 1.0
+    redraw = True  # menu screens are only redrawn after input changed something
+    while running:
+        profiler.begin_frame()
+        frame_no += 1
+        in_game = game_state in ("playing", "boss")
+        if in_game:
+            if dirty is not None:
+                dirty.erase()
+            else:
                 screen.fill(BLACK)
-                inst_title = big_font.render("INSTRUCTIONS", True, WHITE)
-                screen.blit(inst_title, ((SCREEN_WIDTH - inst_title.get_width())//2, 40))
-                lines = [
-                    "Move: Left / Right arrows",
-                    "Shoot: SPACE (limited by difficulty)",
-                    "HP: If HP reaches 0 → you lose 1 life (HP resets to 100)",
-                    "Lives: Lose all lives → Game Over",
-                    "Enemies that reach low screen also cost a life",
-                    "Boss appears every 20 points; beat it for +10 points",
-                    "Use arrow keys + Enter in menu to change difficulty"
-                ]
-                for i, line in enumerate(lines):
-                    screen.blit(font.render(line, True, WHITE), (60, 160 + i*36))
-                screen.blit(font.render("Press any key or click to return", True, WHITE), ((SCREEN_WIDTH - 360)//2, 520))
-                pygame.display.update()
-                clock.tick(30)
-        # draw fallback menu visuals
-        title = big_font.render("SPACE INVADERS", True, WHITE)
-        screen.blit(title, ((SCREEN_WIDTH - title.get_width()) // 2, 80))
-        btn_diff.text = f"Difficulty: {selected_difficulty}"
-        btn_start.draw(screen); btn_instruct.draw(screen); btn_diff.draw(screen); btn_quit.draw(screen)
-        screen.blit(font.render(f"High Score: {high_score}", True, (255,215,0)), (10, SCREEN_HEIGHT-40))
-
-    elif game_state == "playing":
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] and player_x > 0:
-            player_x -= 6
-        if keys[pygame.K_RIGHT] and player_x < SCREEN_WIDTH - 60:
-            player_x += 6
-
-        # shoot with limit
-        bullet_limit = DIFFICULTIES[selected_difficulty]['bullet_limit']
-        if keys[pygame.K_SPACE]:
-            if len(bullets) < bullet_limit:
-                bullets.append([player_x + 28, player_y])
-                shoot_sound.play()
-
-        # move bullets
-        for b in bullets[:]:
-            b[1] -= bullet_speed
-            screen.blit(bullet_img, (b[0], b[1]))
-            if b[1] < 0:
-                bullets.remove(b)
-
-        # spawn boss if condition met
-        if (not boss_active) and score >= next_boss_score and score != 0:
-            spawn_boss()
-            boss_active = True
-            game_state = "boss"
-
-        # update enemies list
-        for enemy in enemies[:]:
-            enemy['x'] += enemy['speed']
-            if enemy['x'] <= 0 or enemy['x'] >= SCREEN_WIDTH - 48:
-                enemy['speed'] = -enemy['speed']
-                enemy['y'] += 40
-            screen.blit(enemy['img'], (enemy['x'], enemy['y']))
-
-            # if enemy falls too low, cost a life and remove
-            if enemy['y'] > SCREEN_HEIGHT - 120:
-                try:
-                    enemies.remove(enemy)
-                except ValueError:
-                    pass
-                lives -= 1
-                add_explosion(enemy['x'], enemy['y'])
-                if lives <= 0:
-                    game_state = "gameover"
-                continue
-
-            # bullets vs enemy
-            for b in bullets[:]:
-                if is_collision(enemy['x'], enemy['y'], b[0], b[1]):
-                    if b in bullets:
-                        bullets.remove(b)
-                    explosion_sound.play()
-                    add_explosion(enemy['x'], enemy['y'])
-                    # respawn enemy
-                    enemy['x'] = random.randint(0, SCREEN_WIDTH - 48)
-                    enemy['y'] = random.randint(60, 160)
-                    base = random.choice([2,3,4])
-                    enemy['speed'] = base * DIFFICULTIES[selected_difficulty]['speed_mul']
-                    enemy['img'] = random.choice(enemy_imgs)
-                    score += 1
-
-            # enemy vs player collision - damage HP
-            if is_collision(enemy['x'] + 24, enemy['y'] + 18, player_x + 30, player_y + 20, threshold=40):
-                player_hp -= 30
-                explosion_sound.play()
-                add_explosion(enemy['x'], enemy['y'])
-                # respawn enemy
-                enemy['x'] = random.randint(0, SCREEN_WIDTH - 48)
-                enemy['y'] = random.randint(60, 160)
-                if player_hp <= 0:
-                    lives -= 1
-                    player_hp = 100
-                    if lives <= 0:
-                        game_state = "gameover"
-
-        # draw player
-        screen.blit(player_img, (player_x, player_y))
-        # HUD
-        screen.blit(font.render(f"Score: {score}", True, WHITE), (10,10))
-        draw_health_bar(screen, 160, 10, 220, 20, player_hp)
-        draw_lives(screen, 10, 50, lives)
-        update_and_draw_explosions(screen)
-
-        if len(enemies) == 0:
-            enemies = create_enemies()
-
-    elif game_state == "boss":
-        # safety: ensure boss exists
-        if boss is None:
-            # fallback: spawn if missing
-            spawn_boss()
-            boss_active = True
-
-        # boss movement
-        boss['x'] += boss['speed']
-        if boss['x'] <= 0 or boss['x'] >= SCREEN_WIDTH - boss['img'].get_width():
-            boss['speed'] = -boss['speed']
-
-        # draw boss
-        screen.blit(boss['img'], (boss['x'], boss['y']))
-        # draw boss HP bar
-        maxhp = 16 if selected_difficulty=="Hard" else (12 if selected_difficulty=="Medium" else 10)
-        pygame.draw.rect(screen, (100,100,100), (SCREEN_WIDTH//2 - 100, boss['y'] - 20, 200, 12))
-        pygame.draw.rect(screen, (200,0,0), (SCREEN_WIDTH//2 - 100, boss['y'] - 20, int(200 * (boss['hp'] / maxhp)), 12))
-        pygame.draw.rect(screen, WHITE, (SCREEN_WIDTH//2 - 100, boss['y'] - 20, 200, 12), 2)
-
-        # player movement during boss
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] and player_x > 0: player_x -= 6
-        if keys[pygame.K_RIGHT] and player_x < SCREEN_WIDTH - 60: player_x += 6
-        bullet_limit = DIFFICULTIES[selected_difficulty]['bullet_limit']
-        if keys[pygame.K_SPACE]:
-            if len(bullets) < bullet_limit:
-                bullets.append([player_x + 28, player_y])
-                shoot_sound.play()
-
-        # bullets move and draw
-        for b in bullets[:]:
-            b[1] -= bullet_speed
-            screen.blit(bullet_img, (b[0], b[1]))
-            if b[1] < 0: bullets.remove(b)
-
-        # bullets vs boss - safe check
-        if boss is not None:
-            for b in bullets[:]:
-                if is_collision(boss['x'] + boss['img'].get_width()/2, boss['y'] + boss['img'].get_height()/2, b[0], b[1], threshold=70):
-                    if b in bullets: bullets.remove(b)
-                    explosion_sound.play()
-                    add_explosion(boss['x'], boss['y'])
-                    boss['hp'] -= 1
-                    if boss['hp'] <= 0:
-                        explosion_sound.play()
-                        add_explosion(boss['x'], boss['y'])
-                        score += 10
-                        boss = None
-                        boss_active = False
-                        next_boss_score += 20
-                        enemies = create_enemies()
-                        game_state = "playing"
+            events = pygame.event.get()
+        else:
+            # menus sleep in event.wait until there is input to react to
+            events = pygame.event.get() if redraw else wait_events(MENU_IDLE_MS)
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                show_profiler = not show_profiler
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_BACKSPACE:
+                if in_game and replaying is None and coop is None and rewind_game() and recording is not None:
+                    del recording.inputs[state.tick:]  # the recording follows the rewound timeline
+            elif game_state in MENU_SCREENS:
+                action, changed = menu_event(game_state, event)
+                redraw = redraw or changed
+                if action == "quit":
+                    running = False
+                elif action == "start":
+                    reset_game()
+                    game_state = "playing"
+                    last_time = None
+                    if args.record:
+                        recording = Recording.for_state(state)
+                else:
+                    game_state = action
+        profiler.mark("events")
+
+        if in_game:
+            # run as many fixed 1/60 s ticks as real time calls for
+            now = time.perf_counter()
+            if lockstep:
+                ticks = 1
+            else:
+                if last_time is None:
+                    last_time, lag = now, SIM_DT
+                lag = min(lag + now - last_time, MAX_LAG)
+                ticks = min(int(lag / SIM_DT), MAX_TICKS_PER_FRAME)
+                lag -= ticks * SIM_DT
+            last_time = now
+            if coop is not None:
+                for _ in range(ticks):
+                    coop.send_input(read_inputs())
+                ticks = 0
+                latest, events = coop.latest()  # own tank already predicted
+                if latest.tick != state.tick:
+                    state = latest
+                    tick_effects(events)
+                if coop.closed.is_set() and state.game_state != "gameover":
+                    print("Lost connection to the co-op server")
+                    running = False
+                    break
+            for _ in range(ticks):
+                if replaying is not None:
+                    if replay_pos >= len(replaying):
+                        running = False
                         break
-
-        # boss hits player - safe check
-        if boss is not None:
-            if is_collision(boss['x'] + boss['img'].get_width()/2, boss['y'] + boss['img'].get_height()/2, player_x + 30, player_y + 20, threshold=80):
-                player_hp -= 40
-                explosion_sound.play()
-                add_explosion(boss['x'], boss['y'])
-                if player_hp <= 0:
-                    lives -= 1
-                    player_hp = 100
-                    if lives <= 0:
-                        game_state = "gameover"
-                    else:
-                        boss = None
-                        boss_active = False
-                        enemies = create_enemies()
-                        game_state = "playing"
-
-        # draw player and HUD
-        screen.blit(player_img, (player_x, player_y))
-        screen.blit(font.render(f"Score: {score}", True, WHITE), (10,10))
-        draw_health_bar(screen, 160, 10, 220, 20, player_hp)
-        draw_lives(screen, 10, 50, lives)
-        update_and_draw_explosions(screen)
-
-    elif game_state == "gameover":
-        # update high score
-        if score > high_score:
-            save_high_score(score)
-            high_score = score
-        screen.blit(big_font.render("GAME OVER", True, WHITE), ((SCREEN_WIDTH - 350)//2, SCREEN_HEIGHT//2 - 80))
-        screen.blit(font.render(f"Final Score: {score}", True, WHITE), ((SCREEN_WIDTH - 200)//2, SCREEN_HEIGHT//2 - 10))
-        screen.blit(font.render(f"High Score: {max(score, high_score)}", True, (255,215,0)), ((SCREEN_WIDTH - 220)//2, SCREEN_HEIGHT//2 + 30))
-        if btn_restart.draw(screen):
-            game_state = "menu"
-
-    pygame.display.update()
-    clock.tick(60)
-
-# Save highscore on exit
-if score > high_score:
-    save_high_score(score)
-
-pygame.quit()
-sys.exit()
+                    inputs = replaying.inputs[replay_pos]
+                    replay_pos += 1
+                else:
+                    inputs = read_inputs()
+                if recording is not None:
+                    recording.record(inputs)
+                profiler.mark("input")
+                prev_pos = snapshot(state)
+                tick_effects(step(state, inputs, profiler))
+                if replaying is None:
+                    rewind.maybe_push(state)
+                if state.game_state == "gameover":
+                    break
+            if not running:
+                break
+            render_alpha = 1.0 if lockstep or coop is not None else min(1.0, lag / SIM_DT)
+            # still behind after the catch-up ticks: skip this render, not the sim
+            if lag >= SIM_DT and skipped < MAX_FRAME_SKIP:
+                skipped += 1
+                frames_skipped += 1
+                frame_rects = None
+            else:
+                skipped = 0
+                frame_rects = draw_game(screen, static_hud=(dirty is None), prof=profiler,
+                                        want_rects=dirty is not None)
+                if show_profiler:
+                    frame_rects.append(draw_profiler_overlay(screen, frame_no))
+                    profiler.mark("hud")
+            game_state = state.game_state
+            if game_state == "gameover":
+                if coop is not None:
+                    coop.close()  # co-op runs stay off the single-player leaderboard
+                    coop = None
+                elif replaying is None:
+                    finish_run()
+                menu["hover"] = False
+                redraw = True
+            if recording is not None and game_state == "gameover":
+                recording.final_score = state.score
+                recording.save(args.record)
+                recording = None
+            if replaying is not None and game_state == "gameover":
+                running = False
+
+        elif redraw and game_state in MENU_SCREENS:
+            DRAW_SCREEN[game_state](screen)
+
+        shown = frame_rects is not None if in_game else redraw
+        if in_game and frame_rects is None:
+            pass  # skipped render frame
+        elif dirty is not None and in_game:
+            dirty.present(frame_rects)
+        elif in_game or redraw:
+            pygame.display.update()
+            if dirty is not None:
+                dirty.invalidate()
+            if not in_game:
+                redraw = False
+        profiler.mark("display")
+        if capture is not None and shown:
+            capture.grab(screen)  # never waits on the disk; drops the frame instead
+            profiler.mark("capture")
+        if fps and in_game:
+            clock.tick(fps)
+        profiler.mark("tick_wait")
+        # only gameplay frames are sampled; menus idle in event.wait
+        if in_game:
+            profiler.end_frame()
+
+    if recording is not None:
+        # quit mid-game: keep what was played, final score unknown
+        recording.save(args.record)
+    if replaying is not None:
+        elapsed = time.perf_counter() - replay_start
+        print(f"Replayed {replay_pos} ticks in {elapsed:.2f}s, final score {state.score}")
+    if frames_skipped:
+        print(f"Skipped {frames_skipped} render frames to keep the simulation at {SIM_HZ} ticks/s")
+
+    # quitting mid-game still counts the run; close() flushes pending writes
+    if coop is not None:
+        coop.close()
+    elif game_state in ("playing", "boss") and replaying is None:
+        finish_run()
+    leaderboard.close()
+
+    if args.profile:
+        profiler.dump(args.profile)
+    if capture is not None:
+        print(capture.close())
+
+    pygame.quit()
+    sys.exit()
+
+# importing this module (benchmarks, tools) loads assets but doesn't start the game
+if __name__ == "__main__":
+    main()
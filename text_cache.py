@@ -0,0 +1,56 @@
+# text_cache.py - cached text rendering for HUD and menus
+#
+# font.render() rasterizes glyphs every call; labels that don't change between
+# frames are kept as surfaces instead, and numeric counters are drawn from a
+# pre-rendered digit atlas so a changing score never re-rasterizes anything.
+from collections import OrderedDict
+
+import pygame
+
+class TextCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()  # (font, text, colour) -> Surface, oldest first
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, tuple(color))
+        img = self._surfaces.get(key)
+        if img is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return img
+        self.misses += 1
+        img = font.render(text, True, color)
+        self._surfaces[key] = img
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return img
+
+    def clear(self):
+        self._surfaces.clear()
+
+class DigitAtlas:
+    def __init__(self, font, color):
+        self.glyphs = {ch: font.render(ch, True, color) for ch in "0123456789-"}
+        self.height = font.get_height()
+
+    def width(self, value):
+        return sum(self.glyphs[ch].get_width() for ch in str(int(value)))
+
+    def blit_seq(self, value, pos):
+        # ([(glyph, pos), ...] for Surface.blits, area covered)
+        x, y = pos
+        seq = []
+        for ch in str(int(value)):
+            g = self.glyphs[ch]
+            seq.append((g, (x, y)))
+            x += g.get_width()
+        return seq, pygame.Rect(pos[0], y, x - pos[0], self.height)
+
+    def draw(self, surf, value, pos):
+        # blit the digits of value left to right; returns the area drawn
+        seq, area = self.blit_seq(value, pos)
+        surf.blits(seq, False)
+        return area
@@ -0,0 +1,161 @@
+# tuner.py - Monte Carlo difficulty tuner over the DIFFICULTIES table
+#
+# Plays thousands of headless games with a scripted bot for every point of a
+# parameter grid (speed_mul x enemy_count x bullet_limit x boss_hp), spread
+# over a process pool, and writes per-configuration survival time, score
+# distribution and boss-kill rate.
+#
+#   python tuner.py --games 200 -o tuning.csv
+#   python tuner.py --speed-mul 0.8,1.0,1.2 --enemy-count 8 --bullet-limit 5 --boss-hp 10,12,14
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from game_core import (
+    GameState, step, DIFFICULTIES, BOSS_HP, BOSS_W, ENEMY_W, PLAYER_W,
+    INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE,
+)
+
+# ---------------------------
+# BOTS
+# ---------------------------
+def bot_tracker(state, rng):
+    # fire constantly and slide under the lowest enemy (or the boss)
+    if state.game_state == "boss" and state.boss is not None:
+        target = state.boss['x'] + BOSS_W / 2
+    else:
+        en = state.enemies
+        ei = en.indices()
+        if len(ei) == 0:
+            return INPUT_FIRE
+        i = ei[np.argmax(en.y[ei])]
+        target = en.x[i] + ENEMY_W / 2
+    centre = state.player_x + PLAYER_W / 2
+    if target < centre - 6:
+        return INPUT_FIRE | INPUT_LEFT
+    if target > centre + 6:
+        return INPUT_FIRE | INPUT_RIGHT
+    return INPUT_FIRE
+
+def bot_sweeper(state, rng):
+    # same pattern as benchmark.py: sweep left/right while firing
+    return INPUT_FIRE | (INPUT_RIGHT if (state.tick // 50) % 2 == 0 else INPUT_LEFT)
+
+def bot_random(state, rng):
+    return int(rng.integers(8))
+
+BOTS = {"tracker": bot_tracker, "sweeper": bot_sweeper, "random": bot_random}
+
+# ---------------------------
+# WORKER
+# ---------------------------
+def play_game(config, seed, bot, max_ticks):
+    state = GameState("Medium", seed=seed, config=config)
+    rng = np.random.default_rng(seed ^ 0x5EED)
+    bosses = 0
+    was_boss = False
+    while state.game_state != "gameover" and state.tick < max_ticks:
+        step(state, bot(state, rng))
+        in_boss = state.game_state == "boss"
+        if in_boss and not was_boss:
+            bosses += 1
+        was_boss = in_boss
+    kills = (state.next_boss_score - 20) // 20
+    return state.tick, state.score, bosses, kills
+
+def run_batch(task):
+    # one (config, seed range) chunk; only small tuples cross the process boundary
+    key, config, seeds, bot_name, max_ticks = task
+    bot = BOTS[bot_name]
+    return key, [play_game(config, seed, bot, max_ticks) for seed in seeds]
+
+# ---------------------------
+# DRIVER
+# ---------------------------
+def parse_list(text, cast):
+    return [cast(v) for v in text.split(",") if v.strip()]
+
+def summarize(key, games, max_ticks):
+    ticks = np.array([g[0] for g in games])
+    scores = np.array([g[1] for g in games])
+    bosses = sum(g[2] for g in games)
+    kills = sum(g[3] for g in games)
+    speed_mul, enemy_count, bullet_limit, boss_hp = key
+    return {
+        "speed_mul": speed_mul, "enemy_count": enemy_count,
+        "bullet_limit": bullet_limit, "boss_hp": boss_hp,
+        "games": len(games),
+        "survival_s_mean": float(ticks.mean()) / 60,
+        "survival_s_p10": float(np.percentile(ticks, 10)) / 60,
+        "survival_s_p50": float(np.percentile(ticks, 50)) / 60,
+        "survival_s_p90": float(np.percentile(ticks, 90)) / 60,
+        "timeout_rate": float((ticks >= max_ticks).mean()),
+        "score_mean": float(scores.mean()),
+        "score_std": float(scores.std()),
+        "score_p10": float(np.percentile(scores, 10)),
+        "score_p50": float(np.percentile(scores, 50)),
+        "score_p90": float(np.percentile(scores, 90)),
+        "boss_encounters": int(bosses),
+        "boss_kill_rate": kills / bosses if bosses else 0.0,
+    }
+
+def main(argv=None):
+    # the swarm preset is a different game (one formation), not a point on this scale
+    classic = [d for d, p in DIFFICULTIES.items() if not p.get("formation")]
+    presets = [DIFFICULTIES[d] for d in classic]
+    parser = argparse.ArgumentParser(description="Monte Carlo sweep over difficulty parameters")
+    parser.add_argument("--speed-mul", default=",".join(str(p["speed_mul"]) for p in presets))
+    parser.add_argument("--enemy-count", default=",".join(str(p["enemy_count"]) for p in presets))
+    parser.add_argument("--bullet-limit", default=",".join(str(p["bullet_limit"]) for p in presets))
+    parser.add_argument("--boss-hp", default=",".join(str(BOSS_HP[d]) for d in classic))
+    parser.add_argument("--games", type=int, default=100, help="games per configuration")
+    parser.add_argument("--bot", choices=sorted(BOTS), default="tracker")
+    parser.add_argument("--max-ticks", type=int, default=60 * 60 * 5, help="cap per game (default 5 min)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=25, help="games per task sent to a worker")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; game i uses seed + i")
+    parser.add_argument("-o", "--output", default="tuning.csv", help=".csv or .json")
+    args = parser.parse_args(argv)
+
+    grid = list(itertools.product(parse_list(args.speed_mul, float), parse_list(args.enemy_count, int),
+                                  parse_list(args.bullet_limit, int), parse_list(args.boss_hp, int)))
+    tasks = []
+    for key in grid:
+        config = dict(zip(("speed_mul", "enemy_count", "bullet_limit", "boss_hp"), key))
+        for lo in range(0, args.games, args.chunk):
+            seeds = range(args.seed + lo, args.seed + min(lo + args.chunk, args.games))
+            tasks.append((key, config, seeds, args.bot, args.max_ticks))
+
+    print(f"{len(grid)} configurations x {args.games} games on {args.workers} workers")
+    results = {key: [] for key in grid}
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        for n, (key, games) in enumerate(pool.imap_unordered(run_batch, tasks), 1):
+            results[key].extend(games)
+            print(f"\r{n}/{len(tasks)} batches", end="", flush=True)
+    elapsed = time.perf_counter() - start
+    total_ticks = sum(g[0] for games in results.values() for g in games)
+    print(f"\n{len(grid) * args.games} games, {total_ticks} ticks in {elapsed:.1f}s "
+          f"({total_ticks / elapsed:.0f} ticks/s, {total_ticks / elapsed / args.workers:.0f} per worker)")
+
+    rows = [summarize(key, results[key], args.max_ticks) for key in grid]
+    if args.output.lower().endswith(".json"):
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+    else:
+        with open(args.output, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0]))
+            w.writeheader()
+            w.writerows(rows)
+    print("Results written to", args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+# vec_env.py - vectorized multi-instance environment for bots and training
+#
+# Holds N independent games as (N,) and (N, slots) NumPy arrays and advances
+# all of them with one step(actions) call. The rules mirror game_core.step()
+# (same speeds, bounce, thresholds and boss flow); finished games are reset
+# in place with reset_game() semantics.
+#
+#   env = VecEnv(256, seed=0)
+#   obs = env.reset()
+#   obs, reward, done = env.step(actions)   # actions: (N,) INPUT_* bitmasks
+#
+# reward is the score gained that tick; obs is a flat float32 feature vector
+# per env, or a low-res (N, 60, 80) occupancy image with obs="pixels".
+import numpy as np
+
+from game_core import (
+    DIFFICULTIES, BOSS_HP, SCREEN_WIDTH, SCREEN_HEIGHT,
+    PLAYER_W, PLAYER_H, ENEMY_W, ENEMY_H, BOSS_W, BOSS_H, BULLET_W, BULLET_H,
+    PLAYER_SPEED, BULLET_SPEED, INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE,
+    BULLET_ENEMY_DIST, ENEMY_PLAYER_DIST, BULLET_BOSS_DIST, BOSS_PLAYER_DIST,
+)
+
+PLAYING, BOSS = 0, 1
+PLAYER_Y = SCREEN_HEIGHT - 70
+
+class VecEnv:
+    def __init__(self, num_envs, difficulty="Medium", seed=None, obs="vector", pixel_scale=10, config=None):
+        self.num_envs = n = num_envs
+        self.config = dict(DIFFICULTIES[difficulty], boss_hp=BOSS_HP[difficulty])
+        if config:
+            self.config.update(config)
+        if self.config.get("formation"):
+            raise ValueError("VecEnv only simulates the classic waves, not swarm formations")
+        self.obs_mode = obs
+        self.pixel_scale = pixel_scale
+        self.rng = np.random.default_rng(seed)
+        e, b = self.config["enemy_count"], self.config["bullet_limit"]
+
+        self.player_x = np.zeros(n)
+        self.hp = np.zeros(n, dtype=np.int32)
+        self.lives = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.next_boss = np.zeros(n, dtype=np.int64)
+        self.mode = np.zeros(n, dtype=np.int8)
+        self.tick = np.zeros(n, dtype=np.int64)
+        self.boss_x = np.zeros(n)
+        self.boss_speed = np.zeros(n)
+        self.boss_hp = np.zeros(n, dtype=np.int32)
+
+        self.ex = np.zeros((n, e))
+        self.ey = np.zeros((n, e))
+        self.es = np.zeros((n, e))
+        self.ealive = np.zeros((n, e), dtype=bool)
+        self.bx = np.zeros((n, b))
+        self.by = np.zeros((n, b))
+        self.balive = np.zeros((n, b), dtype=bool)
+
+    # ---------------------------
+    # RESET
+    # ---------------------------
+    def _roll_enemies(self, mask):
+        # fresh x, y, speed for every enemy slot where mask is set
+        k = int(mask.sum())
+        self.ex[mask] = self.rng.integers(0, SCREEN_WIDTH - ENEMY_W, k, endpoint=True)
+        self.ey[mask] = self.rng.integers(60, 160, k, endpoint=True)
+        self.es[mask] = self.rng.choice([2, 3, 4], k) * self.config["speed_mul"]
+
+    def _new_wave(self, envs):
+        wave = np.zeros_like(self.ealive)
+        wave[envs] = True
+        self._roll_enemies(wave)
+        self.ealive[envs] = True
+
+    def _reset_envs(self, envs):
+        self.player_x[envs] = (SCREEN_WIDTH - PLAYER_W) // 2
+        self.hp[envs] = 100
+        self.lives[envs] = 3
+        self.score[envs] = 0
+        self.next_boss[envs] = 20
+        self.mode[envs] = PLAYING
+        self.tick[envs] = 0
+        self.balive[envs] = False
+        self._new_wave(envs)
+
+    def reset(self):
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.observe()
+
+    # ---------------------------
+    # STEP
+    # ---------------------------
+    def _damage(self, amount, hits):
+        # apply `hits` (N,) consecutive hits of `amount`; every time HP drops
+        # to 0 a life is lost and HP refills, exactly like one-by-one hits
+        for _ in range(int(hits.max(initial=0))):
+            hit = hits > 0
+            self.hp[hit] -= amount
+            dead = hit & (self.hp <= 0)
+            self.hp[dead] = 100
+            self.lives[dead] -= 1
+            hits = hits - 1
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        score_before = self.score.copy()
+        playing = self.mode == PLAYING
+        boss = ~playing
+        self.tick += 1
+
+        # boss movement happens before the player moves
+        self.boss_x[boss] += self.boss_speed[boss]
+        flip = boss & ((self.boss_x <= 0) | (self.boss_x >= SCREEN_WIDTH - BOSS_W))
+        self.boss_speed[flip] = -self.boss_speed[flip]
+
+        # player
+        left = (actions & INPUT_LEFT).astype(bool) & (self.player_x > 0)
+        self.player_x[left] -= PLAYER_SPEED
+        right = (actions & INPUT_RIGHT).astype(bool) & (self.player_x < SCREEN_WIDTH - PLAYER_W)
+        self.player_x[right] += PLAYER_SPEED
+
+        # fire into the first free bullet slot
+        free = ~self.balive
+        fire = (actions & INPUT_FIRE).astype(bool) & free.any(axis=1)
+        envs = np.flatnonzero(fire)
+        slot = free[envs].argmax(axis=1)
+        self.bx[envs, slot] = self.player_x[envs] + 28
+        self.by[envs, slot] = PLAYER_Y
+        self.balive[envs, slot] = True
+
+        # bullets
+        self.by[self.balive] -= BULLET_SPEED
+        self.balive &= self.by >= 0
+
+        self._step_playing(playing)
+        self._step_boss(boss)
+
+        reward = (self.score - score_before).astype(np.float32)
+        done = self.lives <= 0
+        if done.any():
+            self._reset_envs(done)
+        return self.observe(), reward, done
+
+    def _step_playing(self, playing):
+        cfg = self.config
+        # spawn boss if condition met (the wave still updates this tick)
+        spawn = playing & (self.score >= self.next_boss) & (self.score != 0)
+        self.mode[spawn] = BOSS
+        self.boss_x[spawn] = (SCREEN_WIDTH - BOSS_W) // 2
+        self.boss_speed[spawn] = 3 * cfg["speed_mul"]
+        self.boss_hp[spawn] = cfg["boss_hp"]
+
+        live = self.ealive & playing[:, None]
+        self.ex[live] += self.es[live]
+        bounce = live & ((self.ex <= 0) | (self.ex >= SCREEN_WIDTH - ENEMY_W))
+        self.es[bounce] = -self.es[bounce]
+        self.ey[bounce] += 40
+
+        # enemies that fall too low cost a life each and are removed
+        low = live & (self.ey > SCREEN_HEIGHT - 120)
+        self.ealive &= ~low
+        self.lives -= low.sum(axis=1).astype(np.int32)
+        live &= ~low
+
+        # bullets vs enemies: (N, E, B) distances, each enemy and bullet used once
+        dx = self.ex[:, :, None] - self.bx[:, None, :]
+        dy = self.ey[:, :, None] - self.by[:, None, :]
+        hit = live[:, :, None] & self.balive[:, None, :] & (dx*dx + dy*dy < BULLET_ENEMY_DIST**2)
+        first = hit.argmax(axis=2)
+        has = hit.any(axis=2)
+        pick = np.zeros_like(hit)
+        ni, ei = np.nonzero(has)
+        pick[ni, ei, first[ni, ei]] = True
+        pick &= np.cumsum(pick, axis=1) == 1  # a bullet only counts for its first enemy
+        hit_e = pick.any(axis=2)
+        self.balive &= ~pick.any(axis=1)
+        self._roll_enemies(hit_e)
+        self.score += hit_e.sum(axis=1)
+
+        # enemy vs player
+        dx = self.ex + ENEMY_W / 2 - (self.player_x[:, None] + PLAYER_W / 2)
+        dy = self.ey + ENEMY_H / 2 - (PLAYER_Y + PLAYER_H / 2)
+        touch = live & ~hit_e & (dx*dx + dy*dy < ENEMY_PLAYER_DIST**2)
+        if touch.any():
+            self._damage(30, touch.sum(axis=1))
+            k = int(touch.sum())
+            self.ex[touch] = self.rng.integers(0, SCREEN_WIDTH - ENEMY_W, k, endpoint=True)
+            self.ey[touch] = self.rng.integers(60, 160, k, endpoint=True)
+
+        empty = playing & ~self.ealive.any(axis=1)
+        if empty.any():
+            self._new_wave(empty)
+
+    def _step_boss(self, boss):
+        bcx = self.boss_x + BOSS_W / 2
+        bcy = 60 + BOSS_H / 2
+
+        # bullets vs boss, in slot order until the boss dies
+        dx = self.bx - bcx[:, None]
+        dy = self.by - bcy
+        hit = boss[:, None] & self.balive & (dx*dx + dy*dy < BULLET_BOSS_DIST**2)
+        hit &= np.cumsum(hit, axis=1) <= self.boss_hp[:, None]
+        self.balive &= ~hit
+        self.boss_hp -= hit.sum(axis=1).astype(np.int32)
+        killed = boss & (self.boss_hp <= 0)
+        self.score[killed] += 10
+        self.next_boss[killed] += 20
+
+        # boss hits player
+        dx = bcx - (self.player_x + PLAYER_W / 2)
+        dy = bcy - (PLAYER_Y + PLAYER_H / 2)
+        touch = boss & ~killed & (dx*dx + dy*dy < BOSS_PLAYER_DIST**2)
+        lives = self.lives.copy()
+        self._damage(40, touch.astype(np.int32))
+        lost = touch & (self.lives < lives) & (self.lives > 0)
+
+        over = killed | lost
+        self.mode[over] = PLAYING
+        if over.any():
+            self._new_wave(over)
+
+    # ---------------------------
+    # OBSERVATIONS
+    # ---------------------------
+    def observe(self):
+        if self.obs_mode == "pixels":
+            return self.render_pixels()
+        n = self.num_envs
+        sw, sh = float(SCREEN_WIDTH), float(SCREEN_HEIGHT)
+        head = np.stack([
+            self.player_x / sw, self.hp / 100.0, self.lives / 3.0, self.mode.astype(float),
+            self.boss_x / sw, self.boss_hp / float(self.config["boss_hp"]),
+        ], axis=1)
+        enemies = np.stack([self.ex / sw, self.ey / sh, self.ealive], axis=2).reshape(n, -1)
+        bullets = np.stack([self.bx / sw, self.by / sh, self.balive], axis=2).reshape(n, -1)
+        return np.concatenate([head, enemies, bullets], axis=1).astype(np.float32)
+
+    def _paint(self, img, env, x, y, w, h, value):
+        # mark every low-res cell covered by the (x, y, w, h) boxes
+        s = self.pixel_scale
+        rows, cols = img.shape[1:]
+        x0 = np.clip((x // s).astype(int), 0, cols - 1)
+        y0 = np.clip((y // s).astype(int), 0, rows - 1)
+        for oy in range(-(-h // s) + 1):
+            for ox in range(-(-w // s) + 1):
+                cx = np.minimum(x0 + ox, np.clip(((x + w - 1) // s).astype(int), 0, cols - 1))
+                cy = np.minimum(y0 + oy, np.clip(((y + h - 1) // s).astype(int), 0, rows - 1))
+                img[env, cy, cx] = value
+
+    def render_pixels(self):
+        # (N, H/scale, W/scale) uint8 occupancy: enemies/boss 255, bullets 170, player 85
+        s = self.pixel_scale
+        img = np.zeros((self.num_envs, SCREEN_HEIGHT // s, SCREEN_WIDTH // s), dtype=np.uint8)
+        n_idx = np.arange(self.num_envs)
+        self._paint(img, n_idx, self.player_x, np.full(self.num_envs, float(PLAYER_Y)), PLAYER_W, PLAYER_H, 85)
+        env, slot = np.nonzero(self.balive)
+        self._paint(img, env, self.bx[env, slot], self.by[env, slot], BULLET_W, BULLET_H, 170)
+        env, slot = np.nonzero(self.ealive & (self.mode == PLAYING)[:, None])
+        self._paint(img, env, self.ex[env, slot], self.ey[env, slot], ENEMY_W, ENEMY_H, 255)
+        env = np.flatnonzero(self.mode == BOSS)
+        self._paint(img, env, self.boss_x[env], np.full(len(env), 60.0), BOSS_W, BOSS_H, 255)
+        return img